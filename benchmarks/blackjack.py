@@ -0,0 +1,137 @@
+import argparse
+import random
+import time
+from benchmarks.common import Member
+from vkp.templates import TEMPLATES
+from vkp.views import Blackjack
+
+CARD_BACK = {"card": Blackjack.CARD_BACK, "value": 0}
+
+
+# Dealing as it was before cards were small integers: every game copies the deck of card dicts, draws with
+# random.choice and list.remove and walks a hand again whenever its total is needed. The view, embeds and
+# database writes of the old BlackJackView are left out, like they are from the new game below
+class ListDeckGame:
+    def __init__(self, deck: list):
+        self.deck = deck.copy()
+        self.user_hand = [self.random_card() for _ in range(2)]
+        self.dealer_hand = [self.random_card() for _ in range(2)]
+
+    def random_card(self):
+        card = random.choice(self.deck)
+        self.deck.remove(card)
+        return card
+
+    def calculate_hand(self, hand):
+        total_value = 0
+        ace_count = 0
+        for card in hand:
+            value = card["value"]
+            if value == "ace":
+                ace_count += 1
+                total_value += 11
+            else:
+                total_value += value
+
+        while ace_count > 0 and total_value > 21:
+            total_value -= 10
+            ace_count -= 1
+        return total_value
+
+    def hand_embed_fields(self, win: bool = False):
+        dealer_hand = self.dealer_hand if win else [self.dealer_hand[0], CARD_BACK]
+        return [{"name": f"Dealer | {self.calculate_hand(dealer_hand)}",
+                 "value": "".join([card["card"] for card in dealer_hand])},
+                {"name": f"User | {self.calculate_hand(self.user_hand)}",
+                 "value": "".join([card["card"] for card in self.user_hand])}]
+
+    def check_for_blackjack(self):
+        return self.calculate_hand(self.user_hand) == 21 or self.calculate_hand(self.dealer_hand) == 21
+
+    def user_draw(self):
+        self.user_hand.append(self.random_card())
+        if self.calculate_hand(self.user_hand) > 21:
+            return True
+        if self.calculate_hand(self.user_hand) == 21:
+            return self.dealer_draw()
+        self.hand_embed_fields()
+        return False
+
+    def dealer_draw(self):
+        while self.calculate_hand(self.dealer_hand) < 17:
+            self.dealer_hand.append(self.random_card())
+        self.calculate_hand(self.dealer_hand)
+        self.calculate_hand(self.user_hand)
+        self.hand_embed_fields(True)
+        return True
+
+
+# Play a game, hitting below stand_on
+def play_list_deck_game(deck: list, stand_on: int):
+    game = ListDeckGame(deck)
+    if game.check_for_blackjack():
+        game.hand_embed_fields(True)
+        return
+    game.hand_embed_fields()
+
+    while game.calculate_hand(game.user_hand) < stand_on:
+        if game.user_draw():
+            return
+    game.dealer_draw()
+
+
+def play_game(blackjack: Blackjack, member: Member, stand_on: int):
+    game, outcome = blackjack.start_game(member, 100, 1, 1)
+    blackjack.hand_embed_fields(game, outcome is not None)
+    while outcome is None and game.user_hand.total < stand_on:
+        outcome = blackjack.play(game, "hit")
+        blackjack.hand_embed_fields(game, outcome is not None)
+    if outcome is None:
+        blackjack.hand_embed_fields(game, blackjack.play(game, "stand") is not None)
+
+
+# Play games for about seconds seconds, returns the games played and the time it took
+def play_games(play, seconds: float):
+    games = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for _ in range(1000):
+            play()
+        games += 1000
+    return games, time.perf_counter() - start
+
+
+# Play each implementation in alternating rounds, so both are measured under the same machine load.
+# Returns games per second of each
+def games_per_second(plays: list, seconds: float, rounds: int):
+    totals = [[0, 0] for _ in plays]
+    for _ in range(rounds):
+        for play, total in zip(plays, totals):
+            games, elapsed = play_games(play, seconds / rounds)
+            total[0] += games
+            total[1] += elapsed
+    return [games / elapsed for games, elapsed in totals]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Blackjack games per second, dealing from a copied list of card dicts like before and from "
+                    "the shared shoe of card numbers. Run from the repository root: python -m benchmarks.blackjack")
+    parser.add_argument("--seconds", type=float, default=3, help="Seconds to play each implementation")
+    parser.add_argument("--rounds", type=int, default=10, help="Alternating rounds the seconds are split into")
+    parser.add_argument("--stand-on", type=int, default=17, help="Total the simulated user stands on")
+    arguments = parser.parse_args()
+
+    deck = TEMPLATES.get("cardDeck")
+    blackjack = Blackjack()
+    member = Member(1)
+
+    before, after = games_per_second([lambda: play_list_deck_game(deck, arguments.stand_on),
+                                      lambda: play_game(blackjack, member, arguments.stand_on)],
+                                     arguments.seconds, arguments.rounds)
+    print(f"  Copied list of card dicts  {before:>10,.0f} games/s")
+    print(f"  Shoe of card numbers       {after:>10,.0f} games/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import time
+import uuid
+import threading
+import functools
+
+# Values the bots read from the environment, so the benchmarks run without a .env file
+os.environ.setdefault("TOKENS", "tokens")
+os.environ.setdefault("CURRENCY", "money")
+
+MONGOMOCK_URL = "mongomock"
+
+# Collection operations that get the emulated round trip when running against mongomock
+OPERATIONS = ["find", "find_one", "find_one_and_update", "find_one_and_delete", "update_one", "update_many",
+              "insert_one", "insert_many", "bulk_write", "replace_one", "delete_one", "count_documents",
+              "estimated_document_count", "aggregate"]
+
+
+# The parts of a discord.Member the database handler uses
+class Member:
+    def __init__(self, user_id: int, display_name: str = None):
+        self.id = user_id
+        self.display_name = display_name or f"User {user_id}"
+
+
+def add_database_arguments(parser):
+    parser.add_argument("--database-url", default=MONGOMOCK_URL,
+                        help="MongoDB server to run against, a database is created on it and dropped afterwards. "
+                             "Runs against mongomock if not given")
+    parser.add_argument("--latency", type=float, default=1,
+                        help="Milliseconds added to every mongomock operation as a stand-in for a round trip")
+
+
+# mongomock answers instantly and isn't atomic, so every operation waits for the round trip and then runs
+# alone, like on a server. Operations called by other operations don't wait again
+def emulate_server(collection_class, latency: float):
+    lock = threading.RLock()
+    state = threading.local()
+
+    def emulated(operation):
+        @functools.wraps(operation)
+        def wrapper(*args, **kwargs):
+            if getattr(state, "inside", False):
+                return operation(*args, **kwargs)
+
+            time.sleep(latency)
+            state.inside = True
+            try:
+                with lock:
+                    return operation(*args, **kwargs)
+            finally:
+                state.inside = False
+
+        return wrapper
+
+    for name in OPERATIONS:
+        setattr(collection_class, name, emulated(getattr(collection_class, name)))
+
+
+# Point the database handlers at a new database, returns a function that drops it
+def use_database(arguments):
+    from vkp import database
+
+    name = f"benchmark_{uuid.uuid4().hex}"
+    os.environ["DATABASE_NAME"] = name
+    os.environ["DATABASE_URL"] = arguments.database_url
+    if arguments.database_url == MONGOMOCK_URL:
+        import mongomock
+        emulate_server(mongomock.collection.Collection, arguments.latency / 1000)
+        database.CLIENTS[MONGOMOCK_URL] = mongomock.MongoClient()
+
+    client = database.get_client(arguments.database_url)
+    return lambda: client.drop_database(name)
+
+
+# Value at a fraction of the sorted values
+def percentile(values: list, fraction: float):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
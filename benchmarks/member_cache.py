@@ -0,0 +1,94 @@
+import argparse
+import gc
+import random
+import tracemalloc
+import discord
+from benchmarks import common  # noqa: F401, sets the environment the bots read
+from vkp.bot import BasicBot
+
+GUILD_ID = 100
+CHANNEL_ID = 200
+TIMESTAMP = "2024-01-01T00:00:00+00:00"
+
+
+# Synthetic gateway payloads, with the fields discord sends for a guild, its members and their activity
+def guild_payload(members: int):
+    return {"id": str(GUILD_ID), "name": "Synthetic guild", "member_count": members, "large": True,
+            "roles": [{"id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+                       "hoist": False, "managed": False, "mentionable": False}],
+            "channels": [{"id": str(CHANNEL_ID), "type": 0, "name": "general", "position": 0,
+                          "permission_overwrites": []}],
+            "members": [], "emojis": [], "stickers": [], "features": []}
+
+
+def member_payload(user_id: int):
+    return {"user": {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None,
+                     "global_name": f"User {user_id}"},
+            "roles": [], "joined_at": TIMESTAMP, "deaf": False, "mute": False, "nick": None, "permissions": "0",
+            "flags": 0}
+
+
+def interaction_payload(user_id: int):
+    return {"id": str(user_id), "application_id": "1", "type": 3, "token": "token", "version": 1,
+            "guild_id": str(GUILD_ID), "channel_id": str(CHANNEL_ID), "member": member_payload(user_id),
+            "data": {"custom_id": f"daily,claim,{user_id}", "component_type": 2}, "locale": "en-US"}
+
+
+def message_payload(message_id: int, user_id: int):
+    member = member_payload(user_id)
+    return {"id": str(message_id), "channel_id": str(CHANNEL_ID), "guild_id": str(GUILD_ID),
+            "author": member.pop("user"), "member": member, "content": "Synthetic message " * 4,
+            "timestamp": TIMESTAMP, "edited_timestamp": None, "tts": False, "mention_everyone": False,
+            "mentions": [], "mention_roles": [], "attachments": [], "embeds": [], "pinned": False, "type": 0}
+
+
+# Feed a bot's connection state the guild, a button click from every member and the guild's messages,
+# returns the memory the state keeps, the cached members and the cached messages
+def simulate(bot: discord.Bot, members: int, messages: int, generator):
+    state = bot._connection
+    gc.collect()
+    tracemalloc.start()
+
+    guild = state._add_guild_from_data(guild_payload(members))
+    channel = guild.get_channel(CHANNEL_ID)
+
+    # Interactions are parsed like parse_interaction_create does, caching the member if the flags allow it
+    for user_id in range(1, members + 1):
+        discord.Interaction(data=interaction_payload(user_id), state=state)
+
+    # Messages only arrive with the message intents, and are kept like parse_message_create does
+    if state._intents.guild_messages:
+        for message_id in range(1, messages + 1):
+            message = discord.Message(channel=channel, data=message_payload(message_id, generator.randint(1, members)),
+                                      state=state)
+            if state._messages is not None:
+                state._messages.append(message)
+
+    gc.collect()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return memory, len(guild._members), len(state._messages or [])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Memory a bot's caches hold for a synthetic guild where every member clicks a button and "
+                    "messages are sent, with discord's default intents and caching and with each bot's profile. "
+                    "Run from the repository root: python -m benchmarks.member_cache")
+    parser.add_argument("--members", type=int, default=100_000, help="Members of the synthetic guild")
+    parser.add_argument("--messages", type=int, default=5_000, help="Messages sent in the synthetic guild")
+    arguments = parser.parse_args()
+
+    # Importing the bots creates them with their profiles without starting them
+    import general
+    import economy
+
+    for name, bot in [("discord defaults", BasicBot()), ("general", general.bot), ("economy", economy.bot)]:
+        memory, cached_members, cached_messages = simulate(bot, arguments.members, arguments.messages,
+                                                           random.Random(0))
+        print(f"  {name:<18} {memory / 1024 / 1024:>8.1f} MiB  {cached_members:>8,} members  "
+              f"{cached_messages:>6,} messages cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import Member, add_database_arguments, use_database
+
+
+# Every buyer buys a token purchases times, returns purchases per second
+def run_buyers(handler, buyers: int, purchases: int, first_user_id: int):
+    members = [Member(user_id) for user_id in range(first_user_id, first_user_id + buyers)]
+    handler.econ_col.insert_many([{"_id": member.id, "cached_name": member.display_name, "balance": 1_000_000,
+                                   "tokens": 0, "tokens_bought": 0} for member in members])
+
+    def buyer(member):
+        for _ in range(purchases):
+            handler.purchase_tokens(member, 1)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=buyers) as executor:
+        list(executor.map(buyer, members))
+    return buyers * purchases / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Token purchase throughput as concurrent buyers scale, with the token pool in one document "
+                    "like before the sharded counter and split over shards. Contention on one document only "
+                    "happens on a server, so use --database-url for meaningful numbers. "
+                    "Run from the repository root: python -m benchmarks.pool_contention")
+    parser.add_argument("--buyers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="Concurrent buyers")
+    parser.add_argument("--purchases", type=int, default=100, help="Purchases per buyer")
+    parser.add_argument("--shards", type=int, default=16, help="Shards of the sharded pool")
+    add_database_arguments(parser)
+    arguments = parser.parse_args()
+
+    drop_database = use_database(arguments)
+    from vkp.database import EconomyDatabaseHandler, ShardedCounter
+    handler = EconomyDatabaseHandler()
+
+    try:
+        first_user_id = 1
+        for shards in [1, arguments.shards]:
+            handler.token_pool = ShardedCounter(handler.counter_col, f"benchmark_pool_{shards}", shards=shards)
+            for buyers in arguments.buyers:
+                throughput = run_buyers(handler, buyers, arguments.purchases, first_user_id)
+                first_user_id += buyers
+                print(f"  {shards:>3} pool shards  {buyers:>4} buyers  {throughput:>9,.0f} purchases/s")
+
+            expected = sum(arguments.buyers) * arguments.purchases
+            assert handler.token_pool.total() == expected, "the pool lost purchases"
+    finally:
+        drop_database()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import random
+import time
+from benchmarks.common import Member, add_database_arguments, use_database, percentile
+
+BATCH_SIZE = 10_000
+
+
+def create_users(handler, users: int, generator):
+    handler.econ_col.delete_many({})
+    for start in range(1, users + 1, BATCH_SIZE):
+        handler.econ_col.insert_many([{"_id": user_id, "cached_name": f"User {user_id}",
+                                       "balance": generator.randint(0, 1_000_000), "tokens": 0, "tokens_bought": 0}
+                                      for user_id in range(start, min(start + BATCH_SIZE, users + 1))])
+
+
+# Find a rank the way it had to be done with get_values_sorted, reading everyone above the user
+def scan_rank(handler, member):
+    for rank, user in enumerate(handler.get_values_sorted(collection="economy", query={}, fields={"_id": 1},
+                                                          sort_field="balance", sort_direction=-1), 1):
+        if user["_id"] == member.id:
+            return rank
+
+
+# Time lookups of random users, returns the times in milliseconds
+def time_lookups(handler, lookup, users: int, lookups: int, generator):
+    times = []
+    for _ in range(lookups):
+        member = Member(generator.randint(1, users))
+        handler.user_cache.clear()
+        start = time.perf_counter()
+        lookup(member)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def report(name: str, users: int, times: list):
+    print(f"  {name:<26} {users:>9,} users  mean {sum(times) / len(times):>9.2f} ms  "
+          f"p50 {percentile(times, 0.5):>9.2f} ms  p99 {percentile(times, 0.99):>9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank lookups with get_rank, an indexed count, compared with scanning the sorted leaderboard "
+                    "like get_values_sorted allowed. mongomock has no indexes, so use --database-url for "
+                    "meaningful numbers. Run from the repository root: python -m benchmarks.rank")
+    parser.add_argument("--users", type=int, nargs="+", default=[100_000, 1_000_000], help="Synthetic users")
+    parser.add_argument("--lookups", type=int, default=200, help="get_rank lookups per size")
+    parser.add_argument("--scan-lookups", type=int, default=10, help="Scanning lookups per size, 0 to skip them")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic balances")
+    add_database_arguments(parser)
+    arguments = parser.parse_args()
+
+    drop_database = use_database(arguments)
+    from vkp.database import EconomyDatabaseHandler
+    handler = EconomyDatabaseHandler()
+    generator = random.Random(arguments.seed)
+
+    try:
+        for users in arguments.users:
+            start = time.perf_counter()
+            create_users(handler, users, generator)
+            print(f"Created {users:,} users in {time.perf_counter() - start:.1f}s")
+
+            report("get_rank", users, time_lookups(handler, lambda member: handler.get_rank(member, "balance"),
+                                                   users, arguments.lookups, generator))
+            if arguments.scan_lookups:
+                report("Scanning get_values_sorted", users,
+                       time_lookups(handler, lambda member: scan_rank(handler, member), users,
+                                    arguments.scan_lookups, generator))
+    finally:
+        drop_database()
+
+
+if __name__ == "__main__":
+    main()
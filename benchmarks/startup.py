@@ -0,0 +1,55 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that only the economy bot needs, the general bot shouldn't import them
+HEAVY_MODULES = ["pymongo", "bson", "numpy"]
+
+
+# Import a bot in a new interpreter, returns the import time in milliseconds and the imported modules
+def import_bot(module: str):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+
+    # Lines look like "import time:  self [us] | cumulative | imported package", nested imports are indented
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, package = line.split("|")
+        imports[package.strip()] = (int(cumulative), len(package) - len(package.lstrip()))
+    return imports[module][0] / 1000, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cold start import time of every bot, measured in a new interpreter with python -X importtime. "
+                    "Run from the repository root: python -m benchmarks.startup")
+    parser.add_argument("--bots", nargs="+", default=["general", "economy"], help="Bot modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="Imports per bot, the median is reported")
+    parser.add_argument("--top", type=int, default=5, help="Slowest direct imports to list")
+    arguments = parser.parse_args()
+
+    for module in arguments.bots:
+        runs = [import_bot(module) for _ in range(arguments.runs)]
+        times = [milliseconds for milliseconds, _ in runs]
+        imports = runs[-1][1]
+
+        heavy = [name for name in HEAVY_MODULES if name in imports]
+        print(f"{module}: median {statistics.median(times):.1f} ms, min {min(times):.1f} ms, "
+              f"{len(imports)} modules, loads {', '.join(heavy) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+
+        # Direct imports of the bot are indented one level deeper than the bot
+        depth = imports[module][1] + 2
+        direct = sorted(((microseconds, name) for name, (microseconds, indent) in imports.items()
+                         if indent == depth), reverse=True)
+        for microseconds, name in direct[:arguments.top]:
+            print(f"  {name:<32} {microseconds / 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import asyncio
+import argparse
+import time
+from benchmarks.common import Member, add_database_arguments, use_database
+
+
+# Measure how late a 10 ms sleep wakes up, which is how late gateway heartbeats and other commands would run
+async def measure_lag(lags: list):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+# A command reading and then changing a balance, like /balance followed by a payment
+async def blocking_command(handler, member):
+    handler.get_balance(member)
+    handler.add_balance(member, 1)
+
+
+async def awaited_command(edb, member):
+    await edb.get_balance(member)
+    await edb.add_balance(member, 1)
+
+
+# Run users concurrent users each running commands commands, returns commands per second and the loop lags
+async def run_users(command, handler, users: int, commands: int):
+    lags = []
+    lag_task = asyncio.create_task(measure_lag(lags))
+
+    async def user(member):
+        for _ in range(commands):
+            await command(handler, member)
+            # Stand-in for responding to the interaction, which lets other tasks run
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(Member(user_id)) for user_id in range(1, users + 1)))
+    seconds = time.perf_counter() - start
+    lag_task.cancel()
+    return users * commands / seconds, lags
+
+
+def report(name: str, users: int, throughput: float, lags: list):
+    print(f"  {name:<22} {users:>5} users  {throughput:>9,.0f} commands/s  "
+          f"max loop lag {max(lags, default=0) * 1000:>8.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Command throughput with concurrent simulated users, calling the database handler on the "
+                    "event loop like the commands did before AsyncEconomyDatabaseHandler and awaiting it on its "
+                    "executor. Run from the repository root: python -m benchmarks.throughput")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 50, 100], help="Concurrent users")
+    parser.add_argument("--commands", type=int, default=20, help="Commands run by every user")
+    parser.add_argument("--workers", type=int, default=8, help="Executor threads of the async handler")
+    add_database_arguments(parser)
+    arguments = parser.parse_args()
+
+    drop_database = use_database(arguments)
+    from vkp.database import EconomyDatabaseHandler, AsyncEconomyDatabaseHandler
+    handler = EconomyDatabaseHandler()
+    edb = AsyncEconomyDatabaseHandler(max_workers=arguments.workers)
+    await edb.connect()
+
+    try:
+        for users in arguments.users:
+            report("On the event loop", users, *await run_users(blocking_command, handler, users, arguments.commands))
+            report("Executor", users, *await run_users(awaited_command, edb, users, arguments.commands))
+    finally:
+        drop_database()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,14 +3,25 @@ import math
 import random
 import discord, datetime
 from discord.ext import tasks
-from vkp import (BasicBot, EconomyDatabaseHandler, get_env_var, floor, Blackjack, error_embed, simple_message_embed,
-                 format_money, format_tokens, Default, DailyView)
-
-# Create database handler
-EDB = EconomyDatabaseHandler()
-
-# Create a basic bot
-bot = BasicBot(debug_guilds=[os.getenv("GUILD")])
+from vkp.bot import BasicBot, log_errors
+from vkp.config import Default, get_env_var
+from vkp.database import AsyncEconomyDatabaseHandler
+from vkp.locks import UserLocks
+from vkp.templates import TEMPLATES
+from vkp.utils import floor, error_embed, simple_message_embed, format_money, format_tokens
+from vkp.views import Blackjack, LeaderboardView, daily_components, handle_daily_interaction
+
+# Create database handler, transfers only run in transactions if the database supports them (replica sets)
+# and gambling results are batched if write behind is enabled
+EDB = AsyncEconomyDatabaseHandler(transactions=get_env_var("DATABASE_TRANSACTIONS") == "true",
+                                  write_behind=get_env_var("TOKEN_WRITE_BEHIND") == "true")
+
+# Serializes each user's balance and token changes
+USER_LOCKS = UserLocks()
+
+# Create a basic bot, it only needs guild events and reads members from interactions, so members and messages aren't cached
+bot = BasicBot(debug_guilds=[os.getenv("GUILD")], intents=discord.Intents(guilds=True),
+               member_cache_flags=discord.MemberCacheFlags.none(), max_messages=None, chunk_guilds_at_startup=False)
 
 # Initialize blackjack
 blackjack_object = Blackjack()
@@ -23,6 +34,7 @@ midnight = datetime.time(hour=22, minute=0, second=0)
 
 # Run a loop at midnight
 @tasks.loop(time=midnight)
+@log_errors
 async def midnight_loop():
     if datetime.datetime.today().weekday() == 0:
         # Get bot announcement channel to send message in
@@ -30,7 +42,7 @@ async def midnight_loop():
         channel = await guild.fetch_channel(Default.ANNOUNCEMENTS_CHANNEL)
 
         # Reset token balances and pool and get the winners
-        winners, pool = EDB.reset_tokens()
+        winners, pool = await EDB.reset_tokens()
 
         # Check if there were any winners
         if len(winners) == 0:
@@ -56,11 +68,71 @@ async def midnight_loop():
         await channel.send(embed=embed)
 
 
+@bot.event
+async def on_interaction(interaction: discord.Interaction):
+    if interaction.data and "custom_id" in interaction.data.keys():
+        arguments = interaction.data["custom_id"].split(",")
+
+        # Game and daily buttons are routed by their custom_id, so they don't need a view in memory
+        if arguments[0] == "blackjack":
+            await blackjack_object.handle_interaction(interaction, arguments, EDB)
+            return
+        if arguments[0] == "daily":
+            await handle_daily_interaction(interaction, arguments, EDB)
+            return
+
+    # If the interaction is a command, just process it
+    await bot.process_application_commands(interaction)
+
+
+# Reconcile the in-memory leaderboards with the database, the first run seeds them
+@tasks.loop(minutes=10)
+@log_errors
+async def leaderboard_loop():
+    await EDB.seed_leaderboards()
+
+
+# Write the batched gambling results
+@tasks.loop(seconds=0.25)
+@log_errors
+async def token_flush_loop():
+    await EDB.flush_tokens()
+
+
+# Stand for the users of abandoned blackjack games and pay out the outcome
+@tasks.loop(seconds=30)
+@log_errors
+async def game_sweep_loop():
+    for document in await EDB.expire_games(Default.GAME_TIMEOUT):
+        outcome = blackjack_object.expire(document)
+        if outcome[2]:
+            await EDB.pay_tokens(document["user_id"], outcome[2])
+
+
+# Write the remaining gambling results and report how batching, locking and caching went before shutting down
+async def flush_tokens_on_close():
+    # Nothing to flush if the bot never connected to the database
+    if EDB.handler is None:
+        return
+
+    await EDB.flush_tokens()
+    print(EDB.flush_latency)
+    print(EDB.flush_size)
+    print(USER_LOCKS.wait_time)
+    print(f"User cache: hits={EDB.user_cache.hits} misses={EDB.user_cache.misses}")
+    print(f"Active blackjack games: {await EDB.count_games()}")
+
+
+bot.close_callbacks.append(flush_tokens_on_close)
+
+
 # Pay user, command
 @bot.slash_command(description="Pay a user")
 async def pay(ctx: discord.ApplicationContext, user: discord.Member, amount: float):
-    # Check if user is a member of the guild
-    if not ctx.guild.get_member(user.id):
+    # Check if user is a member of the guild. Members of the guild are resolved from the interaction, others
+    # aren't cached so they are fetched as a last resort
+    if (not isinstance(user, discord.Member)
+            and await discord.utils.get_or_fetch(ctx.guild, "member", user.id, default=None) is None):
         await ctx.respond(embed=error_embed(ctx.author,
                                       "Specified member doesn't exist in this discord server"), ephemeral=True)
         return
@@ -78,17 +150,15 @@ async def pay(ctx: discord.ApplicationContext, user: discord.Member, amount: flo
                                       f"You have to pay more than {format_money(0)}"), ephemeral=True)
         return
 
-    # Check if user has enough money
-    if amount > EDB.get_balance(ctx.author):
+    # Transfer money if user has enough of it
+    async with USER_LOCKS.lock(ctx.author.id, user.id):
+        balance_left = await EDB.transfer(ctx.author, user, amount)
+    if balance_left is None:
         await ctx.respond(embed=error_embed(ctx.author,
                                       "Insufficient funds"),
                           ephemeral=True)
         return
 
-    # Transfer money
-    EDB.add_balance(ctx.author, -amount)
-    EDB.add_balance(user, amount)
-
     embed = simple_message_embed(ctx.author, f"Paid {user.display_name} {format_money(amount)}")
     embed.set_author(name=user.display_name, icon_url=user.display_avatar.url)
 
@@ -102,11 +172,11 @@ async def balance(ctx: discord.ApplicationContext, user: discord.Member = None):
     # Check if a user is specified, else get author
     user = user or ctx.author
 
-    user_balance = EDB.get_balance(user)
+    user_balance = await EDB.get_balance(user)
 
     # Create embed and if user is ctx author then write "You" instead of a username
     message = f"You currently have {format_money(user_balance)}"
-    if user is not ctx.author:
+    if user.id != ctx.author.id:
         message = f"{user.display_name} currently has {format_money(user_balance)}"
 
     embed = simple_message_embed(ctx.author, message)
@@ -117,25 +187,39 @@ async def balance(ctx: discord.ApplicationContext, user: discord.Member = None):
 
 @bot.slash_command(description="See the leaderboard")
 async def leaderboard(ctx: discord.ApplicationContext):
-    embed = simple_message_embed(ctx.author, f"Top {Default.CURRENCY} Leaderboard")
-    current_leaderboard = EDB.get_leaderboard()
-    for x in range(len(current_leaderboard)):
-        user = current_leaderboard[x]
-        embed.add_field(name=f"{x + 1} | {user['cached_name']}", value=f"{format_money(user['balance'])}", inline=False)
-    if len(current_leaderboard) == 0:
-        embed.add_field(name="No users yet", value="_ _", inline=False)
+    view = LeaderboardView(ctx.author, EDB, "balance", f"Top {Default.CURRENCY} Leaderboard", format_money)
+    await view.load()
+    await ctx.respond(embed=view.embed(), view=view)
+
+
+@bot.slash_command(description="See a user's position on the leaderboard")
+async def rank(ctx: discord.ApplicationContext, user: discord.Member = None):
+
+    # Check if a user is specified, else get author
+    user = user or ctx.author
+
+    position, user_balance = await EDB.get_rank(user, "balance")
+
+    # Create embed and if user is ctx author then write "You" instead of a username
+    message = f"You are #{position} with {format_money(user_balance)}"
+    if user.id != ctx.author.id:
+        message = f"{user.display_name} is #{position} with {format_money(user_balance)}"
+
+    embed = simple_message_embed(ctx.author, message)
+    embed.set_author(name=user.display_name, icon_url=user.display_avatar.url)
+
     await ctx.respond(embed=embed)
 
 
 @bot.slash_command(description="See the dailies")
 async def daily(ctx: discord.ApplicationContext):
     view = None
-    if not EDB.is_daily_claimed(ctx.author):
-        view = DailyView(ctx.author, EDB)
+    if not await EDB.is_daily_claimed(ctx.author):
+        view = daily_components(ctx.author)
 
     embed = simple_message_embed(ctx.author, "Dailies forecast")
 
-    dailies = EDB.get_dailies()
+    dailies = await EDB.get_dailies()
 
     for x in range(len(dailies)):
         day = dailies[x]
@@ -157,31 +241,45 @@ async def blackjack(ctx: discord.ApplicationContext, amount: int):
                           ephemeral=True)
         return
 
-    # Make sure user has enough money
-    if EDB.get_tokens(ctx.author) < amount:
+    # Make sure there is room for another game
+    if await EDB.count_games() >= Default.MAX_ACTIVE_GAMES:
+        await ctx.respond(embed=error_embed(ctx.author,
+                                            "Too many games are being played right now, try again later"),
+                          ephemeral=True)
+        return
+
+    async with USER_LOCKS.lock(ctx.author.id):
+        # Make sure user has enough money, the response is sent after the lock is released
+        enough_tokens = await EDB.get_tokens(ctx.author) >= amount
+
+        # Remove amount from user balance to make sure they can't open multiple blackjacks with non-existent money
+        if enough_tokens:
+            await EDB.add_tokens(ctx.author, -amount)
+
+    if not enough_tokens:
         await ctx.respond(embed=error_embed(ctx.author,
                                             "Insufficient funds"),
                           ephemeral=True)
         return
 
-    # Create a view and embed and send it
-    blackjack_view = blackjack_object.create_view(ctx.author, amount, EDB)
-    await ctx.respond(embed=blackjack_view.embed, view=blackjack_view)
+    # Deal the game, save it and send it
+    game, outcome = blackjack_object.start_game(ctx.author, amount, ctx.channel_id, ctx.guild_id)
+    if not outcome:
+        await EDB.save_game(blackjack_object.to_document(game))
+
+    # Pay out straight away if a blackjack decided the game, before responding so a failed response can't lose it
+    elif outcome[2]:
+        await EDB.queue_tokens(ctx.author, outcome[2])
 
-    # Remove amount from user balance to make sure they can't open multiple blackjacks with non-existent money
-    EDB.add_tokens(ctx.author, -amount)
+    await ctx.respond(embed=blackjack_object.embed(game, ctx.author, outcome),
+                      view=blackjack_object.components(game, outcome is not None))
 
 
 @tokens.command(description="See the token leaderboard")
 async def leaderboard(ctx: discord.ApplicationContext):
-    embed = simple_message_embed(ctx.author, f"Top {Default.TOKENS} Leaderboard")
-    current_leaderboard = EDB.get_token_leaderboard()
-    for x in range(len(current_leaderboard)):
-        user = current_leaderboard[x]
-        embed.add_field(name=f"{x + 1} | {user['cached_name']}", value=f"{format_tokens(user['tokens'])}", inline=False)
-    if len(current_leaderboard) == 0:
-        embed.add_field(name="No users yet", value="_ _", inline=False)
-    await ctx.respond(embed=embed)
+    view = LeaderboardView(ctx.author, EDB, "tokens", f"Top {Default.TOKENS} Leaderboard", format_tokens)
+    await view.load()
+    await ctx.respond(embed=view.embed(), view=view)
 
 
 @tokens.command(description="See a user's token balance")
@@ -190,11 +288,11 @@ async def balance(ctx: discord.ApplicationContext, user: discord.Member = None):
     # Check if a user is specified, else get author
     user = user or ctx.author
 
-    user_balance = EDB.get_tokens(user)
+    user_balance = await EDB.get_tokens(user)
 
     # Create embed and if user is ctx author then write "You" instead of a username
     message = f"You currently have {format_tokens(user_balance)}"
-    if user is not ctx.author:
+    if user.id != ctx.author.id:
         message = f"{user.display_name} currently has {format_tokens(user_balance)}"
 
     embed = simple_message_embed(ctx.author, message)
@@ -203,6 +301,25 @@ async def balance(ctx: discord.ApplicationContext, user: discord.Member = None):
     await ctx.respond(embed=embed)
 
 
+@tokens.command(description="See a user's position on the token leaderboard")
+async def rank(ctx: discord.ApplicationContext, user: discord.Member = None):
+
+    # Check if a user is specified, else get author
+    user = user or ctx.author
+
+    position, user_balance = await EDB.get_rank(user, "tokens")
+
+    # Create embed and if user is ctx author then write "You" instead of a username
+    message = f"You are #{position} with {format_tokens(user_balance)}"
+    if user.id != ctx.author.id:
+        message = f"{user.display_name} is #{position} with {format_tokens(user_balance)}"
+
+    embed = simple_message_embed(ctx.author, message)
+    embed.set_author(name=user.display_name, icon_url=user.display_avatar.url)
+
+    await ctx.respond(embed=embed)
+
+
 @tokens.command(description="Buy tokens")
 async def buy(ctx: discord.ApplicationContext, amount: int):
     if amount < 1:
@@ -210,22 +327,22 @@ async def buy(ctx: discord.ApplicationContext, amount: int):
                                             f"You have to buy more than {format_tokens(0)}"),
                           ephemeral=True)
         return
-    if amount*Default.TOKEN_VALUE > EDB.get_balance(ctx.author):
-        await ctx.respond(embed=error_embed(ctx.author,
-                                            "Insufficient funds"),
-                          ephemeral=True)
-        return
-    tokens_bought = EDB.get_tokens_bought(ctx.author)
-    if amount + tokens_bought > Default.MAX_WEEKLY_TOKENS:
+
+    # Buy the tokens if the user can afford them and hasn't reached the weekly limit
+    async with USER_LOCKS.lock(ctx.author.id):
+        purchase = await EDB.purchase_tokens(ctx.author, amount)
+    if not purchase:
+        if floor(amount*Default.TOKEN_VALUE, 2) > await EDB.get_balance(ctx.author):
+            await ctx.respond(embed=error_embed(ctx.author,
+                                                "Insufficient funds"),
+                              ephemeral=True)
+            return
+        tokens_bought = await EDB.get_tokens_bought(ctx.author)
         await ctx.respond(embed=error_embed(ctx.author,
                                             f"You can only buy {format_tokens(Default.MAX_WEEKLY_TOKENS-tokens_bought)} more this week!"),
                           ephemeral=True)
         return
 
-    EDB.add_balance(ctx.author, -amount*Default.TOKEN_VALUE)
-    EDB.add_tokens(ctx.author, amount, True)
-    EDB.add_token_pool(amount)
-
     embed = simple_message_embed(ctx.author,
                                  f"Bought {format_tokens(amount)} for {format_money(floor(amount*Default.TOKEN_VALUE, 2))}")
     embed.description = f"{format_tokens(amount)} were added to the token pool"
@@ -234,7 +351,7 @@ async def buy(ctx: discord.ApplicationContext, amount: int):
 
 @tokens.command(description="See this week's token pool")
 async def pool(ctx: discord.ApplicationContext):
-    token_pool = EDB.get_token_pool()
+    token_pool = await EDB.get_token_pool()
     await ctx.respond(embed=simple_message_embed(ctx.author, f"Current token pool is {format_tokens(token_pool)} "
                                                              f"which is worth {format_money(token_pool*Default.TOKEN_VALUE)}"))
 
@@ -249,39 +366,47 @@ async def diceroll(ctx: discord.ApplicationContext, amount: int):
                           ephemeral=True)
         return
 
-    # Make sure user has enough money
-    if EDB.get_tokens(ctx.author) < amount:
-        await ctx.respond(embed=error_embed(ctx.author,
-                                            "Insufficient funds"),
-                          ephemeral=True)
-        return
+    async with USER_LOCKS.lock(ctx.author.id):
+        # Make sure user has enough money, the response is sent after the lock is released
+        enough_tokens = await EDB.get_tokens(ctx.author) >= amount
+        if enough_tokens:
+            result = random.randint(1, 6)
 
-    winnings = amount
+            embed = simple_message_embed(ctx.author, f"\🎲 The dice rolled {result} \🎲")
+            embed.set_thumbnail(url=TEMPLATES.get("diceSides")[result - 1])
 
-    result = random.randint(1, 6)
+            winnings = math.ceil(amount * Default.DICE_PAYOUTS[result - 1])
+            if winnings > 0:
+                embed.description = f"Which means you won {winnings} {Default.TOKENS}"
+            elif winnings == 0:
+                embed.description = "Which means you got your tokens back"
+            else:
+                embed.description = f"Which means you lost {-winnings} {Default.TOKENS}"
 
-    embed = simple_message_embed(ctx.author, f"\🎲 The dice rolled {result} \🎲")
-    embed.set_thumbnail(url=Default.DICE_IMAGES[result - 1])
+            # Add the winnings before the lock is released, so the user can't bet the same tokens twice
+            await EDB.queue_tokens(ctx.author, winnings)
 
-    if result > 4:
-        winnings *= 0.5 if result == 5 else 1
-        winnings = math.ceil(winnings)
-        embed.description = f"Which means you won {winnings} {Default.TOKENS}"
-    elif result == 4:
-        winnings = 0
-        embed.description = "Which means you got your tokens back"
-    else:
-        embed.description = f"Which means you lost {winnings} {Default.TOKENS}"
-        winnings *= -1
+    if not enough_tokens:
+        await ctx.respond(embed=error_embed(ctx.author,
+                                            "Insufficient funds"),
+                          ephemeral=True)
+        return
 
     # Create an embed and send it
     await ctx.respond(embed=embed)
 
-    # Remove amount from user balance to make sure they can't open multiple blackjacks with non-existent money
-    EDB.add_tokens(ctx.author, winnings)
 
+# Connect to the database once the bot is ready, then start the loops that use it
+@bot.listen("on_ready", once=True)
+async def start_loops():
+    await EDB.connect()
+    midnight_loop.start()
+    leaderboard_loop.start()
+    game_sweep_loop.start()
+    if EDB.write_behind:
+        token_flush_loop.start()
 
-midnight_loop.start()
 
-# Start the bot
-bot.run(get_env_var("ECONOMY_TOKEN"))
+# Start the bot, launcher.py starts it together with the other bots instead
+if __name__ == "__main__":
+    bot.run(get_env_var("ECONOMY_TOKEN"))
@@ -1,13 +1,32 @@
-import json
 import os
 import random
+import time
 import discord
-from vkp import (BasicBot, error_embed, simple_message_embed, Default, simple_embed)
+from vkp.bot import BasicBot
+from vkp.config import Default
+from vkp.metrics import Stats
+from vkp.templates import TEMPLATES
+from vkp.utils import error_embed, simple_message_embed, simple_embed
 
-# Create bot
-bot = BasicBot(debug_guilds=[os.getenv("GUILD")])
+# Create a basic bot, it only needs guild events and reads members from interactions, so members and messages aren't cached
+bot = BasicBot(debug_guilds=[os.getenv("GUILD")], intents=discord.Intents(guilds=True),
+               member_cache_flags=discord.MemberCacheFlags.none(), max_messages=None, chunk_guilds_at_startup=False)
 
-roles = json.load(open("templates/roles.json", "r", encoding="utf8"))
+
+# Role ids per category, so conflicting roles don't have to be looked up on every click
+def build_role_index(roles: dict):
+    return {category: {role["id"] for role in data["roles"]} for category, data in roles.items()}
+
+
+# Time taken to handle a role button
+role_click_latency = Stats("Role click latency (s)")
+
+
+async def print_stats_on_close():
+    print(role_click_latency)
+
+
+bot.close_callbacks.append(print_stats_on_close)
 
 
 @bot.event
@@ -17,36 +36,27 @@ async def on_interaction(interaction: discord.Interaction):
 
         # If role related
         if arguments[0] == "roles":
-            role = interaction.guild.get_role(int(arguments[3]))
-            print(int(arguments[3]))
-            print(role)
+            start = time.perf_counter()
+            role_id = int(arguments[3])
+            role = interaction.guild.get_role(role_id)
+            # The first role is @everyone, which can't be given or taken, like in Member.add_roles
+            member_roles = {member_role.id for member_role in interaction.user.roles[1:]}
 
             # Remove role if user already has it
-            if role in interaction.user.roles:
+            if role_id in member_roles:
                 await interaction.user.remove_roles(role)
                 await interaction.response.send_message(embed=simple_message_embed(user=interaction.user, message=f":x: Removed the \"{role.name}\" role from you"), ephemeral=True)
-
+                role_click_latency.record(time.perf_counter() - start)
                 return
 
+            # Add the role and remove all incompatible roles in one request
+            new_roles = member_roles | {role_id}
             if arguments[1] == "one":
-                global roles
-                remove_roles = []
-
-                # Get all incompatible roles
-                for role_data in roles[arguments[2]]["roles"]:
-                    # If role is the new role don't add it to list
-                    if role_data["id"] == int(arguments[3]):
-                        continue
-                    print("role found")
-                    remove_roles.append(interaction.guild.get_role(role_data["id"]))
-                print(*remove_roles)
-
-                for remove in remove_roles:
-                    if remove in interaction.user.roles:
-                        await interaction.user.remove_roles(remove)
-
-            await interaction.user.add_roles(role)
+                new_roles -= TEMPLATES.get("roles", build_role_index)[arguments[2]] - {role_id}
+
+            await interaction.user.edit(roles=[discord.Object(id=new_role) for new_role in new_roles])
             await interaction.response.send_message(embed=simple_message_embed(user=interaction.user, message=f":white_check_mark: Added the \"{role.name}\" role to your roles"), ephemeral=True)
+            role_click_latency.record(time.perf_counter() - start)
             return
 
     # If the interaction is a command, just process it
@@ -58,6 +68,8 @@ async def on_interaction(interaction: discord.Interaction):
 #
 #    await ctx.defer(ephemeral=True)
 #
+#    roles = TEMPLATES.get("roles")
+#
 #    for category in ["colors", "announcements"]:
 #        embed = simple_embed(title=roles[category]["label"])
 #
@@ -75,10 +87,12 @@ async def on_interaction(interaction: discord.Interaction):
 async def eightball(ctx: discord.ApplicationContext, question: str):
 
     embed = simple_message_embed(ctx.author, f"\🎱 | {question[:200]}")
-    embed.description = random.choice(Default.EIGHTBALL_RESPONSES)
+    embed.description = random.choice(TEMPLATES.get("eightballResponses"))
     embed.color = Default.BLACK
 
     await ctx.respond(embed=embed)
 
 
-bot.run(os.getenv("GENERAL_TOKEN"))
+# Start the bot, launcher.py starts it together with the other bots instead
+if __name__ == "__main__":
+    bot.run(os.getenv("GENERAL_TOKEN"))
@@ -0,0 +1,30 @@
+import asyncio
+import general
+import economy
+from vkp.config import get_env_var
+
+# Bots started by the launcher and the environment variable holding their token.
+# They run on one event loop, so they share the template registry and database clients of this process
+BOTS = [(general.bot, "GENERAL_TOKEN"), (economy.bot, "ECONOMY_TOKEN")]
+
+
+async def close_bots():
+    for bot, _ in BOTS:
+        if not bot.is_closed():
+            await bot.close()
+
+
+def main():
+    # The bots were created with this loop when their modules were imported
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(asyncio.gather(*(bot.start(get_env_var(token)) for bot, token in BOTS)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Close every bot if one of them stops, so the close callbacks run
+        loop.run_until_complete(close_bots())
+
+
+if __name__ == "__main__":
+    main()
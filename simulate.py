@@ -0,0 +1,116 @@
+import argparse
+import math
+import time
+import numpy as np
+from vkp.config import Default
+from vkp.views import Blackjack
+
+# Rounds played at once, bounds memory use
+BATCH_SIZE = 1_000_000
+
+
+# Add a card to every hand in mask, counting aces as 11 until the hand would bust
+def add_cards(total, soft_aces, cards, mask):
+    cards = np.where(mask, cards, 0)
+    total = total + cards
+    soft_aces = soft_aces + (cards == 11)
+
+    # A hand can only hold one soft ace before a card is added, so one adjustment is enough
+    adjust = (total > 21) & (soft_aces > 0)
+    return total - 10 * adjust, soft_aces - adjust
+
+
+# Play blackjack rounds with the rules of Blackjack, the user hits until reaching stand_on.
+# Cards are drawn with replacement, which is close to a shoe of several decks. Returns the winnings per token bet
+def blackjack_rounds(rng, values, rounds: int, stand_on: int):
+    def deal(total, soft_aces, mask):
+        return add_cards(total, soft_aces, rng.choice(values, size=rounds), mask)
+
+    everyone = np.ones(rounds, dtype=bool)
+    user_total, user_soft_aces = np.zeros(rounds, dtype=np.int64), np.zeros(rounds, dtype=np.int64)
+    dealer_total, dealer_soft_aces = np.zeros(rounds, dtype=np.int64), np.zeros(rounds, dtype=np.int64)
+    for _ in range(2):
+        user_total, user_soft_aces = deal(user_total, user_soft_aces, everyone)
+        dealer_total, dealer_soft_aces = deal(dealer_total, dealer_soft_aces, everyone)
+
+    # Check for dealer or user blackjack
+    winnings = np.zeros(rounds)
+    user_blackjack = user_total == 21
+    dealer_blackjack = dealer_total == 21
+    winnings[user_blackjack & ~dealer_blackjack] = Default.BLACKJACK_PAYOUT
+    winnings[dealer_blackjack & ~user_blackjack] = -1
+    playing = ~(user_blackjack | dealer_blackjack)
+
+    # User draws, the dealer draws as soon as the user reaches 21
+    stand_on = min(stand_on, 21)
+    hitting = playing & (user_total < stand_on)
+    while hitting.any():
+        user_total, user_soft_aces = deal(user_total, user_soft_aces, hitting)
+        hitting &= user_total < stand_on
+
+    bust = playing & (user_total > 21)
+    winnings[bust] = -1
+    playing &= ~bust
+
+    # Dealer draws
+    hitting = playing & (dealer_total < Default.DEALER_STANDS_ON)
+    while hitting.any():
+        dealer_total, dealer_soft_aces = deal(dealer_total, dealer_soft_aces, hitting)
+        hitting &= dealer_total < Default.DEALER_STANDS_ON
+
+    winnings[playing & ((dealer_total > 21) | (dealer_total < user_total))] = 1
+    winnings[playing & (dealer_total <= 21) & (dealer_total > user_total)] = -1
+    return winnings
+
+
+# Roll the dice with the payouts of the diceroll command, returns the winnings per token bet
+def diceroll_rounds(rng, rounds: int, bet: int):
+    payouts = np.ceil(np.array(Default.DICE_PAYOUTS) * bet) / bet
+    return payouts[rng.integers(0, 6, size=rounds)]
+
+
+# Play rounds in batches, returns the mean and variance of the winnings per token bet
+def simulate(play, rounds: int):
+    total = 0.0
+    total_squares = 0.0
+    played = 0
+    while played < rounds:
+        winnings = play(min(BATCH_SIZE, rounds - played))
+        total += winnings.sum()
+        total_squares += np.square(winnings).sum()
+        played += len(winnings)
+
+    mean = total / played
+    return mean, total_squares / played - mean ** 2
+
+
+def report(name: str, mean: float, variance: float, rounds: int, bet: int, games_per_week: int, seconds: float):
+    print(f"{name} ({rounds:,} rounds in {seconds:.1f}s)")
+    print(f"  Expected value: {mean:+.4f} per token bet, house edge {-mean:.2%}")
+    print(f"  Variance: {variance:.4f}, standard error {math.sqrt(variance / rounds):.5f}")
+    print(f"  Token drain per week: {-mean * bet * games_per_week:,.0f} tokens "
+          f"({games_per_week:,} games of {bet:,} tokens)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the house edge of blackjack and diceroll")
+    parser.add_argument("--rounds", type=int, default=5_000_000, help="Rounds to play per game")
+    parser.add_argument("--bet", type=int, default=100, help="Tokens bet per round")
+    parser.add_argument("--games-per-week", type=int, default=10_000, help="Rounds played per week per game")
+    parser.add_argument("--stand-on", type=int, default=17, help="Total the simulated blackjack user stands on")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible results")
+    arguments = parser.parse_args()
+
+    rng = np.random.default_rng(arguments.seed)
+    values = np.frombuffer(Blackjack().values, dtype=np.uint8).astype(np.int64)
+
+    for name, play in [("Blackjack", lambda rounds: blackjack_rounds(rng, values, rounds, arguments.stand_on)),
+                       ("Diceroll", lambda rounds: diceroll_rounds(rng, rounds, arguments.bet))]:
+        start = time.perf_counter()
+        mean, variance = simulate(play, arguments.rounds)
+        report(name, mean, variance, arguments.rounds, arguments.bet, arguments.games_per_week,
+               time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
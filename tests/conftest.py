@@ -0,0 +1,55 @@
+import os
+import uuid
+import threading
+import functools
+import pytest
+from vkp import database
+
+# Tests run against this MongoDB server if it's set, else against mongomock
+MONGODB_TEST_URL = os.getenv("MONGODB_TEST_URL")
+MONGOMOCK_URL = "mongodb://mongomock"
+
+# Operations a server applies atomically per document. mongomock doesn't, so they are run one at a time
+ATOMIC_OPERATIONS = ["find_one_and_update", "find_one_and_delete", "update_one", "update_many", "replace_one",
+                     "delete_one", "insert_one", "bulk_write"]
+
+
+def atomic(operation, lock):
+    @functools.wraps(operation)
+    def wrapper(*args, **kwargs):
+        with lock:
+            return operation(*args, **kwargs)
+
+    return wrapper
+
+
+@pytest.fixture
+def uses_server():
+    return MONGODB_TEST_URL is not None
+
+
+# Point the handlers at a new database, which is dropped afterwards
+@pytest.fixture
+def database_name(monkeypatch):
+    name = f"test_{uuid.uuid4().hex}"
+    monkeypatch.setenv("DATABASE_NAME", name)
+
+    if MONGODB_TEST_URL:
+        monkeypatch.setenv("DATABASE_URL", MONGODB_TEST_URL)
+        yield name
+        database.get_client(MONGODB_TEST_URL).drop_database(name)
+        return
+
+    mongomock = pytest.importorskip("mongomock")
+    lock = threading.RLock()
+    for name_ in ATOMIC_OPERATIONS:
+        monkeypatch.setattr(mongomock.collection.Collection, name_,
+                            atomic(getattr(mongomock.collection.Collection, name_), lock))
+    monkeypatch.setenv("DATABASE_URL", MONGOMOCK_URL)
+    monkeypatch.setitem(database.CLIENTS, MONGOMOCK_URL, mongomock.MongoClient())
+    yield name
+
+
+@pytest.fixture
+def handler(database_name):
+    return database.EconomyDatabaseHandler()
@@ -0,0 +1,22 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# The parts of a discord.Member the database handler uses
+class Member:
+    def __init__(self, user_id: int, display_name: str = None):
+        self.id = user_id
+        self.display_name = display_name or f"User {user_id}"
+
+
+# Call func from amount threads released at the same moment, returns their results
+def run_at_once(func, amount: int):
+    barrier = threading.Barrier(amount)
+
+    def worker():
+        barrier.wait()
+        return func()
+
+    with ThreadPoolExecutor(max_workers=amount) as executor:
+        futures = [executor.submit(worker) for _ in range(amount)]
+        return [future.result() for future in futures]
@@ -0,0 +1,68 @@
+import time
+from vkp.database import TimedCache, TopLeaderboard
+
+
+def user(user_id: int, tokens: int, version: int):
+    return {"_id": user_id, "cached_name": f"User {user_id}", "tokens": tokens, "version": version}
+
+
+def test_leaderboard_ignores_older_documents():
+    leaderboard = TopLeaderboard("tokens")
+    leaderboard.seed([user(1, 100, 1), user(2, 50, 1)])
+
+    # The document of the second write arrives first
+    leaderboard.update(user(1, 30, 3))
+    leaderboard.update(user(1, 80, 2))
+
+    assert [(entry["_id"], entry["tokens"]) for entry in leaderboard.top(2)] == [(2, 50), (1, 30)]
+
+
+def test_leaderboard_seed_keeps_newer_entries():
+    leaderboard = TopLeaderboard("tokens")
+    leaderboard.seed([user(1, 100, 1)])
+
+    # A reconcile read the user before their last write was applied
+    leaderboard.update(user(1, 200, 2))
+    leaderboard.seed([user(1, 100, 1)])
+
+    assert leaderboard.top(1)[0]["tokens"] == 200
+
+
+def test_cache_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TimedCache(ttl=30)
+    cache.set(1, "value")
+
+    now[0] += 29
+    assert cache.get(1) == "value"
+    now[0] += 2
+    assert cache.get(1) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_evicts_the_least_recently_used_entry():
+    cache = TimedCache(ttl=30, maxsize=2)
+    cache.set(1, "one")
+    cache.set(2, "two")
+    cache.get(1)
+    cache.set(3, "three")
+
+    assert [cache.get(key) for key in [1, 2, 3]] == ["one", None, "three"]
+
+
+def test_cache_never_replaces_a_value_with_an_older_version(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TimedCache(ttl=30, version=lambda document: document["version"])
+    cache.set(1, {"version": 2})
+
+    cache.set(1, {"version": 1})
+    assert cache.get(1) == {"version": 2}
+    cache.set(1, {"version": 3})
+    assert cache.get(1) == {"version": 3}
+
+    # An expired value no longer guards against older ones
+    now[0] += 31
+    cache.set(1, {"version": 1})
+    assert cache.get(1) == {"version": 1}
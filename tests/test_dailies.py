@@ -0,0 +1,39 @@
+from vkp.database import get_daily
+from vkp.utils import get_day
+from tests.helpers import Member, run_at_once
+
+CLICKS = 50
+
+
+def claim_at_once(handler, member):
+    return [daily for daily in run_at_once(lambda: handler.claim_daily(member), CLICKS) if daily is not None]
+
+
+def test_simultaneous_claims_of_a_new_user_grant_one_daily(handler):
+    member = Member(1)
+    daily = get_daily(get_day())
+
+    assert claim_at_once(handler, member) == [daily]
+    user_properties = handler.econ_col.find_one({"_id": member.id})
+    assert user_properties["balance"] == daily["money"]
+    assert user_properties["tokens"] == daily["tokens"]
+    assert handler.token_pool.total() == daily["tokens"]
+
+
+def test_simultaneous_claims_of_an_existing_user_grant_one_daily(handler):
+    member = Member(1)
+    daily = get_daily(get_day())
+    handler.econ_col.insert_one({"_id": member.id, "balance": 10, "tokens": 0, "tokens_bought": 0,
+                                 "daily": get_day() - 1})
+
+    assert claim_at_once(handler, member) == [daily]
+    assert handler.econ_col.find_one({"_id": member.id})["balance"] == 10 + daily["money"]
+    assert handler.token_pool.total() == daily["tokens"]
+    assert handler.is_daily_claimed(member)
+
+
+def test_claimed_daily_can_not_be_claimed_again(handler):
+    member = Member(1)
+
+    assert handler.claim_daily(member) is not None
+    assert handler.claim_daily(member) is None
@@ -0,0 +1,88 @@
+import os
+import random
+import pymongo
+import pytest
+from pymongo import monitoring
+from vkp import database
+from tests.helpers import Member
+
+USERS = 2000
+
+
+# Records the queries a handler sends, so the test explains the queries the handler really runs
+class QueryRecorder(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        if event.command_name in ("find", "aggregate"):
+            self.commands.append(event.command)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# Every stage name of the plans an explain output says were used, the layout differs between query engines
+# and server versions
+def stages(explain):
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "stage":
+                yield value
+            elif key != "rejectedPlans":
+                yield from stages(value)
+    elif isinstance(explain, list):
+        for value in explain:
+            yield from stages(value)
+
+
+@pytest.fixture
+def recorded_handler(database_name, uses_server, monkeypatch):
+    if not uses_server:
+        pytest.skip("explain needs a MongoDB server, set MONGODB_TEST_URL")
+
+    recorder = QueryRecorder()
+    monkeypatch.setitem(database.CLIENTS, os.environ["DATABASE_URL"],
+                        pymongo.MongoClient(os.environ["DATABASE_URL"], event_listeners=[recorder]))
+    handler = database.EconomyDatabaseHandler()
+
+    generator = random.Random(0)
+    handler.econ_col.insert_many([{"_id": user_id, "cached_name": f"User {user_id}",
+                                   "balance": generator.randint(0, 10000), "tokens": generator.randint(0, 3) * 100,
+                                   "tokens_bought": 0}
+                                  for user_id in range(1, USERS + 1)])
+    recorder.commands.clear()
+    return handler, recorder
+
+
+def explain(handler, command: dict):
+    command = {key: value for key, value in command.items() if key != "lsid" and not key.startswith("$")}
+    return handler.db.command({"explain": command, "verbosity": "executionStats"})
+
+
+@pytest.mark.parametrize("field", ["balance", "tokens"])
+def test_leaderboard_queries_use_the_leaderboard_index(recorded_handler, field):
+    handler, recorder = recorded_handler
+
+    # Top of the leaderboard, a page further down and back, and a rank
+    handler.seed_leaderboards()
+    top = handler.get_values_sorted(collection="economy", query={}, fields={"cached_name": 1, field: 1, "_id": 1},
+                                    sort_field=field, sort_direction=-1, limit=10)
+    last = list(top)[-1]
+    handler.get_leaderboard_page(field, after=(last[field], last["_id"]))
+    handler.get_leaderboard_page(field, before=(last[field], last["_id"]))
+    handler.get_rank(Member(USERS // 2), field)
+
+    commands = [command for command in recorder.commands if command.get("find", command.get("aggregate")) == "economy"]
+    assert len(commands) >= 4
+    for command in commands:
+        plan = list(stages(explain(handler, command)))
+        assert "COLLSCAN" not in plan, command
+        assert "SORT" not in plan, command
+
+        # The top of the leaderboard is read from the index alone
+        if "find" in command and not command.get("filter"):
+            assert "FETCH" not in plan, command
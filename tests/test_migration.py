@@ -0,0 +1,18 @@
+import pytest
+from vkp import database
+
+
+def test_interrupted_migration_moves_the_pool_once(database_name, monkeypatch):
+    handler = database.EconomyDatabaseHandler()
+    handler.econ_col.insert_one({"_id": -1, "pool": 500})
+
+    # The process stops after the pool was moved, before the old document is deleted
+    with monkeypatch.context() as patch, pytest.raises(SystemExit):
+        patch.setattr(handler.econ_col, "delete_one", lambda query: exit())
+        handler.migrate_meta()
+
+    handler = database.EconomyDatabaseHandler()
+    assert handler.econ_col.find_one({"_id": -1}) is None
+    assert handler.get_token_pool() == 500
+    assert handler.token_pool.reset() == 500
+    assert handler.get_token_pool() == 0
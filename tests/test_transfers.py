@@ -0,0 +1,78 @@
+import random
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from vkp.config import Default
+from tests.helpers import Member, run_at_once
+
+THREADS = 50
+
+
+def create_user(handler, member, balance: float):
+    handler.econ_col.insert_one({"_id": member.id, "cached_name": member.display_name, "balance": balance,
+                                 "tokens": 0, "tokens_bought": 0})
+
+
+def test_simultaneous_transfers_never_overdraw(handler):
+    sender = Member(1)
+    receivers = [Member(user_id) for user_id in range(2, 7)]
+    create_user(handler, sender, 100)
+
+    results = run_at_once(lambda: handler.transfer(sender, random.choice(receivers), 10), THREADS)
+
+    assert len([result for result in results if result is not None]) == 10
+    assert handler.econ_col.find_one({"_id": sender.id})["balance"] == 0
+    received = sum(user["balance"] for user in handler.econ_col.find({"_id": {"$ne": sender.id}}))
+    assert received == 100
+
+
+def test_simultaneous_purchases_never_overdraw(handler):
+    member = Member(1)
+    create_user(handler, member, 100)
+
+    # 2000 tokens cost 20, so 5 purchases can be afforded
+    results = run_at_once(lambda: handler.purchase_tokens(member, 2000), THREADS)
+
+    assert len([result for result in results if result is not None]) == 5
+    user_properties = handler.econ_col.find_one({"_id": member.id})
+    assert user_properties["balance"] == 0
+    assert user_properties["tokens"] == user_properties["tokens_bought"] == 10000
+    assert handler.token_pool.total() == 10000
+
+
+def test_simultaneous_purchases_respect_the_weekly_limit(handler):
+    member = Member(1)
+    create_user(handler, member, Default.MAX_WEEKLY_TOKENS * Default.TOKEN_VALUE * 10)
+    amount = Default.MAX_WEEKLY_TOKENS // 4 + 1
+
+    results = run_at_once(lambda: handler.purchase_tokens(member, amount), THREADS)
+
+    assert len([result for result in results if result is not None]) == 3
+    assert handler.econ_col.find_one({"_id": member.id})["tokens_bought"] == 3 * amount
+
+
+# Random transfers and purchases between a few users, money is only moved or turned into tokens
+def test_mixed_transfers_and_purchases_keep_every_balance_positive(handler):
+    members = [Member(user_id) for user_id in range(1, 11)]
+    for member in members:
+        create_user(handler, member, 100)
+
+    generator = random.Random(0)
+    operations = []
+    for _ in range(1000):
+        sender, receiver = generator.sample(members, 2)
+        if generator.random() < 0.8:
+            operations.append(lambda sender=sender, receiver=receiver, amount=generator.randint(1, 40):
+                              handler.transfer(sender, receiver, amount))
+        else:
+            operations.append(lambda sender=sender, amount=generator.randint(1, 20) * 100:
+                              handler.purchase_tokens(sender, amount))
+
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        results = list(executor.map(lambda operation: operation(), operations))
+
+    assert any(result is None for result in results)
+    users = list(handler.econ_col.find())
+    assert all(user["balance"] >= 0 for user in users)
+    tokens_bought = sum(user["tokens_bought"] for user in users)
+    assert sum(user["balance"] for user in users) + tokens_bought * Default.TOKEN_VALUE == pytest.approx(1000)
+    assert handler.token_pool.total() == tokens_bought
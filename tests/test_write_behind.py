@@ -0,0 +1,62 @@
+import pymongo
+import pytest
+from vkp import database
+from tests.helpers import Member
+
+
+@pytest.fixture
+def write_behind_handler(database_name):
+    return database.EconomyDatabaseHandler(write_behind=True)
+
+
+# Apply the first writes of a bulk write, then fail like a connection lost before the server replied
+def fail_after(collection, applied: int):
+    bulk_write = collection.bulk_write
+
+    def wrapper(requests, **kwargs):
+        bulk_write(requests[:applied], **kwargs)
+        raise pymongo.errors.AutoReconnect("connection lost")
+
+    return wrapper
+
+
+def tokens(handler, member):
+    return (handler.econ_col.find_one({"_id": member.id}) or {}).get("tokens", 0)
+
+
+def test_failed_flush_only_requeues_unwritten_changes(write_behind_handler, monkeypatch):
+    handler = write_behind_handler
+    members = [Member(user_id) for user_id in range(1, 5)]
+    for member in members:
+        handler.queue_tokens(member, 10)
+
+    with monkeypatch.context() as patch, pytest.raises(pymongo.errors.AutoReconnect):
+        patch.setattr(handler.econ_col, "bulk_write", fail_after(handler.econ_col, 2))
+        handler.flush_tokens()
+
+    assert [handler.get_tokens(member) for member in members] == [10] * 4
+    handler.flush_tokens()
+    assert [tokens(handler, member) for member in members] == [10] * 4
+    assert [handler.get_tokens(member) for member in members] == [10] * 4
+
+
+def test_unconfirmed_flush_is_confirmed_before_the_next_flush(write_behind_handler, monkeypatch):
+    handler = write_behind_handler
+    members = [Member(user_id) for user_id in range(1, 3)]
+    for member in members:
+        handler.queue_tokens(member, 10)
+
+    # Neither the bulk write nor reading back what it wrote reach the server
+    def confirm_flush():
+        raise pymongo.errors.AutoReconnect("connection lost")
+
+    with monkeypatch.context() as patch, pytest.raises(pymongo.errors.AutoReconnect):
+        patch.setattr(handler.econ_col, "bulk_write", fail_after(handler.econ_col, 1))
+        patch.setattr(handler, "confirm_flush", confirm_flush)
+        handler.flush_tokens()
+
+    handler.queue_tokens(members[0], 5)
+    assert [handler.get_tokens(member) for member in members] == [15, 10]
+    handler.flush_tokens()
+    assert [tokens(handler, member) for member in members] == [15, 10]
+    assert [handler.get_tokens(member) for member in members] == [15, 10]
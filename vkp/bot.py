@@ -0,0 +1,35 @@
+import discord, functools, traceback
+
+
+# Bot classes
+class BasicBot(discord.Bot):
+    # Each bot declares the intents and member caching it needs, members that aren't cached are fetched when needed
+    def __init__(self, *args, intents: discord.Intents = None, member_cache_flags: discord.MemberCacheFlags = None,
+                 **kwargs):
+        intents = intents or discord.Intents.default()
+        member_cache_flags = member_cache_flags or discord.MemberCacheFlags.from_intents(intents)
+        super().__init__(*args, intents=intents, member_cache_flags=member_cache_flags, **kwargs)
+
+        # Coroutine functions awaited before the bot closes
+        self.close_callbacks = []
+
+    async def on_ready(self):
+        print(f"Logged in as {self.user}")
+
+    async def close(self):
+        # A failing callback doesn't keep the others from running or the bot from closing
+        for callback in self.close_callbacks:
+            await log_errors(callback)()
+        await super().close()
+
+
+# Print the errors of a task loop's iteration instead of letting them stop the loop
+def log_errors(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            traceback.print_exc()
+
+    return wrapper
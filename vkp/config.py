@@ -0,0 +1,40 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Default values
+class Default:
+    # Constants
+    COLOUR = 0x3044ff
+    ERROR_COLOUR = 0xFF3030
+    SUCCESS_COLOUR = 0x30FF33
+    EMBED_COLOUR = 0x202225
+    EMBED_BACKGROUND_COLOUR = 0x2f3136
+    BLACK = 0x000000
+    TOKEN_VALUE = 0.01
+    MAX_WEEKLY_TOKENS = 50000
+    MAX_DAILY_MONEY = 250
+    MIN_DAILY_MONEY = 100
+    MAX_DAILY_TOKENS = 5000
+    MIN_DAILY_TOKENS = 1000
+    BLACKJACK_DECKS = 6
+    BLACKJACK_PAYOUT = 1.5
+    DEALER_STANDS_ON = 17
+    # Winnings per token bet for each side of the dice, rounded up to whole tokens
+    DICE_PAYOUTS = (-1, -1, -1, 0, 0.5, 1)
+    BLACKJACK_PENETRATION = 0.75
+    BLACKJACK_SHOE_SCOPE = "channel"
+    MAX_ACTIVE_GAMES = 5000
+    GAME_TIMEOUT = 120
+    DAILY_SEED = os.getenv("DAILY_SEED") or os.getenv("DATABASE_NAME")
+    GUILD = os.getenv("GUILD")
+    ANNOUNCEMENTS_CHANNEL = os.getenv("BOT_ANNOUNCEMENT_CHANNEL")
+    CURRENCY = os.getenv("CURRENCY")
+    TOKENS = os.getenv("TOKENS")
+
+
+# Might delete later
+def get_env_var(key: str):
+    return os.getenv(key)
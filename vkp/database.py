@@ -0,0 +1,755 @@
+import discord, pymongo, random, time, asyncio, functools, threading, collections
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from vkp.config import Default, get_env_var
+from vkp.metrics import Stats
+from vkp.utils import floor, get_day
+
+
+# Database classes
+
+
+# One client per database url, so every handler in the process shares its connection pool
+CLIENTS = {}
+CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(url: str) -> pymongo.MongoClient:
+    with CLIENTS_LOCK:
+        if url not in CLIENTS:
+            CLIENTS[url] = pymongo.MongoClient(url)
+        return CLIENTS[url]
+
+
+class BaseDatabaseHandler:
+    # Indexes per collection, which are created at startup
+    INDEXES = {}
+
+    def __init__(self, transactions: bool = False):
+        self.client = get_client(get_env_var("DATABASE_URL"))
+        self.transactions = transactions
+        # Callbacks to run once the transaction of a session committed, session -> callbacks
+        self.commit_callbacks = {}
+
+        # Initialize the database
+        self.db = self.client[get_env_var("DATABASE_NAME")]
+        self.ensure_indexes()
+
+    # Create missing indexes, existing indexes are left untouched
+    def ensure_indexes(self):
+        for collection, indexes in self.INDEXES.items():
+            self.db[collection].create_indexes(indexes)
+
+    # Run func in a multi-document transaction if transactions are enabled, func receives the session.
+    # Callbacks added with after_commit run once the transaction committed
+    def run_transaction(self, func):
+        if not self.transactions:
+            return func(None)
+
+        def attempt(session):
+            # A retried transaction starts over, so the callbacks of the aborted attempt are dropped
+            self.commit_callbacks[session] = []
+            return func(session)
+
+        with self.client.start_session() as session:
+            try:
+                result = session.with_transaction(attempt)
+                callbacks = self.commit_callbacks[session]
+            finally:
+                self.commit_callbacks.pop(session, None)
+
+        for callback in callbacks:
+            callback()
+        return result
+
+    # Run callback once the transaction of session committed, or right away without a transaction
+    def after_commit(self, session, callback):
+        if session is None:
+            callback()
+        else:
+            self.commit_callbacks[session].append(callback)
+
+    def get_one_value(self, collection: str, query, field: str, fallback):
+        content = self.db[collection].find_one(query) or {}
+        return content[field] if field in content else fallback
+
+    def get_values(self, collection: str, query):
+        return self.db[collection].find(query)
+
+    def get_values_sorted(self, collection: str, query, fields, sort_field: str, sort_direction: int, limit: int = -1):
+        return self.db[collection].find(query, fields).sort(sort_field, sort_direction).limit(limit)
+
+
+# Dictionary where entries expire after ttl seconds, the least recently used entries are evicted when it's full
+class TimedCache:
+    # If version is given, it returns the version of a value and set never replaces a value with an older one
+    def __init__(self, ttl: float, maxsize: int = 1024, version=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.version = version
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, fallback=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return fallback
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            entry = self.entries.get(key)
+            if (self.version is not None and entry is not None and entry[0] >= time.monotonic()
+                    and self.version(entry[1]) > self.version(value)):
+                return
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def pop(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Keeps the top of a leaderboard in memory, kept up to date by the database handler's writes
+class TopLeaderboard:
+    def __init__(self, field: str, size: int = 10, slack: int = 40):
+        self.field = field
+        self.size = size
+        self.capacity = size + slack
+        self.entries = {}
+        # Every user not in entries has a value at or below the floor, None if all users are in entries
+        self.floor = None
+        self.seeded = False
+        self.lock = threading.Lock()
+
+    # Replace the entries with the top users from the database, sorted by value
+    def seed(self, documents: list):
+        with self.lock:
+            entries = {document["_id"]: self.entry(document) for document in documents}
+            # Keep entries written after the documents were read
+            for user_id, entry in entries.items():
+                if user_id in self.entries and self.entries[user_id]["version"] > entry["version"]:
+                    entries[user_id] = self.entries[user_id]
+            self.entries = entries
+            self.floor = self.entries[documents[-1]["_id"]][self.field] if len(documents) >= self.capacity else None
+            self.seeded = True
+
+    def update(self, document: dict):
+        value = document.get(self.field, 0)
+        with self.lock:
+            # Documents of concurrent writes can arrive out of order, an older one never replaces a newer one
+            entry = self.entries.get(document["_id"])
+            if entry is not None and entry["version"] > document.get("version", 0):
+                return
+
+            if self.floor is not None and value <= self.floor:
+                # Users at the floor can stay, but users below it might have been passed by users we don't know
+                if document["_id"] in self.entries and value < self.floor:
+                    del self.entries[document["_id"]]
+                if document["_id"] not in self.entries:
+                    return
+
+            self.entries[document["_id"]] = self.entry(document)
+
+            # Drop the lowest user if the leaderboard is full, everyone else is now above them
+            if len(self.entries) > self.capacity:
+                lowest = min(self.entries.values(), key=lambda entry: entry[self.field])
+                del self.entries[lowest["_id"]]
+                self.floor = lowest[self.field]
+
+    # Get the top users, or None if not enough users are known to answer from memory
+    def top(self, limit: int):
+        with self.lock:
+            if not self.seeded or (self.floor is not None and len(self.entries) < limit):
+                return None
+            return sorted(self.entries.values(), key=lambda entry: (-entry[self.field], entry["_id"]))[:limit]
+
+    def entry(self, document: dict):
+        return {"_id": document["_id"], "cached_name": document.get("cached_name"),
+                self.field: document.get(self.field, 0), "version": document.get("version", 0)}
+
+
+# Counter split over several documents, so concurrent writes don't all wait on the same document
+class ShardedCounter:
+    def __init__(self, collection, name: str, shards: int = 16, cache_ttl: float = 5):
+        self.collection = collection
+        self.shard_ids = [f"{name}:{shard}" for shard in range(shards)]
+        # Shard set once by set_initial, counted and reset with the others but never picked by add
+        self.initial_id = f"{name}:initial"
+        self.cache = TimedCache(ttl=cache_ttl, maxsize=1)
+
+    # Add to a random shard
+    def add(self, amount: int, session=None):
+        self.collection.update_one({"_id": random.choice(self.shard_ids)}, {"$inc": {"value": amount}},
+                                   upsert=True, session=session)
+        self.cache.clear()
+
+    # Add an amount that must only be added once, repeating it doesn't change the counter
+    def set_initial(self, amount: int):
+        self.collection.update_one({"_id": self.initial_id}, {"$setOnInsert": {"value": amount}}, upsert=True)
+        self.cache.clear()
+
+    # Sum of all shards, cached for a few seconds
+    def total(self):
+        total = self.cache.get("total")
+        if total is None:
+            total = sum(shard["value"] for shard in
+                        self.collection.find({"_id": {"$in": self.shard_ids + [self.initial_id]}}))
+            self.cache.set("total", total)
+        return total
+
+    # Set every shard to 0 and return the sum they held, amounts added meanwhile are kept in the shards
+    def reset(self):
+        total = 0
+        for shard_id in self.shard_ids + [self.initial_id]:
+            shard = self.collection.find_one_and_update({"_id": shard_id}, {"$set": {"value": 0}})
+            total += shard["value"] if shard else 0
+        self.cache.clear()
+        return total
+
+
+# Runs the blocking pymongo calls of a handler on a bounded thread pool, so they can be awaited
+class AsyncDatabaseHandler:
+    # The handler is created by factory on first use, so importing or creating this doesn't connect to the database
+    def __init__(self, factory, max_workers: int = 8):
+        self.factory = factory
+        self.handler = None
+        self.handler_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="database")
+
+    def get_handler(self) -> BaseDatabaseHandler:
+        with self.handler_lock:
+            if self.handler is None:
+                self.handler = self.factory()
+            return self.handler
+
+    # Create the handler on the executor, so connecting and ensuring indexes doesn't block the event loop
+    async def connect(self):
+        return await self.run(self.get_handler)
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    # Expose every method of the handler as a coroutine
+    def __getattr__(self, name: str):
+        if self.handler is not None:
+            attribute = getattr(self.handler, name)
+            if not callable(attribute):
+                return attribute
+
+        async def wrapper(*args, **kwargs):
+            return await self.run(lambda: getattr(self.get_handler(), name)(*args, **kwargs))
+
+        return wrapper
+
+
+class EconomyDatabaseHandler(BaseDatabaseHandler):
+    # Leaderboard indexes include the projected fields, so leaderboard queries are covered by the index
+    INDEXES = {
+        "economy": [
+            pymongo.IndexModel([("balance", pymongo.DESCENDING), ("_id", pymongo.ASCENDING),
+                                ("cached_name", pymongo.ASCENDING)], name="balance_leaderboard"),
+            pymongo.IndexModel([("tokens", pymongo.DESCENDING), ("_id", pymongo.ASCENDING),
+                                ("cached_name", pymongo.ASCENDING)], name="token_leaderboard"),
+            # Only users holding tokens this week are indexed, so the weekly reset only visits them
+            pymongo.IndexModel([("tokens", pymongo.ASCENDING)], name="token_holders",
+                               partialFilterExpression={"tokens": {"$gt": 0}}),
+            pymongo.IndexModel([("tokens_bought", pymongo.ASCENDING)], name="token_buyers",
+                               partialFilterExpression={"tokens_bought": {"$gt": 0}})
+        ],
+        # Lets the sweeper find abandoned games
+        "blackjack_games": [
+            pymongo.IndexModel([("moved", pymongo.ASCENDING)], name="moved")
+        ]
+    }
+
+    def __init__(self, transactions: bool = False, write_behind: bool = False):
+        super().__init__(transactions)
+
+        # Initialize the collections
+        self.econ_col = self.db["economy"]
+        self.counter_col = self.db["economy_counters"]
+        self.game_col = self.db["blackjack_games"]
+
+        # Initialize the counters
+        self.token_pool = ShardedCounter(self.counter_col, "token_pool")
+        self.migrate_meta()
+
+        # Leaderboards served from memory, seeded by seed_leaderboards
+        self.leaderboards = {"balance": TopLeaderboard("balance"), "tokens": TopLeaderboard("tokens")}
+
+        # Recently viewed leaderboard pages
+        self.page_cache = TimedCache(ttl=30, maxsize=256)
+
+        # Recently used user documents, updated by the handler's own writes. Every write increments a user's
+        # version, so a document read before a concurrent write never replaces the one written after it
+        self.user_cache = TimedCache(ttl=30, maxsize=4096,
+                                     version=lambda user_properties: user_properties.get("version", 0))
+
+        # Token changes queued by queue_tokens, user id -> [amount, cached name], written by flush_tokens.
+        # Amounts being flushed are kept as user id -> (flush id, amount) and the written documents are
+        # marked with the flush id
+        self.write_behind = write_behind
+        self.pending_tokens = {}
+        self.flushing_tokens = {}
+        # (flush id, changes) of a flush that failed before knowing which changes were written
+        self.unconfirmed_flush = None
+        self.pending_lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.flush_latency = Stats("Token flush latency (s)")
+        self.flush_size = Stats("Token flush size (users)")
+
+    # Move the old global document (_id -1) out of the economy collection, so it only contains users
+    def migrate_meta(self):
+        document = self.econ_col.find_one({"_id": -1})
+        if not document:
+            return
+
+        # Dailies don't need to be moved, they are derived from the day. The pool is moved before the old
+        # document is deleted and only once, so a migration stopped between the two steps can be run again
+        if document.get("pool"):
+            self.token_pool.set_initial(document["pool"])
+        self.econ_col.delete_one({"_id": -1})
+
+    # Load the top users of every leaderboard from the database, also used to reconcile them periodically
+    def seed_leaderboards(self):
+        for field, leaderboard in self.leaderboards.items():
+            leaderboard.seed(list(self.get_values_sorted(collection="economy", query={},
+                                                         fields={"cached_name": 1, field: 1, "_id": 1, "version": 1},
+                                                         sort_field=field, sort_direction=-1,
+                                                         limit=leaderboard.capacity)))
+
+    # Get a user's document through the user cache, an empty document if the user doesn't exist yet
+    def get_user(self, user_id: int):
+        user_properties = self.user_cache.get(user_id)
+        if user_properties is None:
+            user_properties = self.econ_col.find_one({"_id": user_id}) or {}
+            self.user_cache.set(user_id, user_properties)
+        return user_properties
+
+    # Update a user and return the updated document, all user writes go through here to keep leaderboards
+    # and the user cache updated
+    def update_user(self, query: dict, update: dict, upsert: bool = True, session=None):
+        update = {**update, "$inc": {**update.get("$inc", {}), "version": 1}}
+        user_properties = self.econ_col.find_one_and_update(query, update, upsert=upsert,
+                                                            return_document=pymongo.ReturnDocument.AFTER,
+                                                            session=session)
+        if not user_properties:
+            # The cached document might be why a conditional update was attempted
+            self.user_cache.pop(query["_id"])
+            return user_properties
+
+        # A document written in a transaction is only cached once it's committed
+        self.after_commit(session, lambda: self.cache_user(user_properties))
+        return user_properties
+
+    # Put a written document in the user cache and the leaderboards
+    def cache_user(self, user_properties: dict):
+        self.user_cache.set(user_properties["_id"], user_properties)
+        for leaderboard in self.leaderboards.values():
+            leaderboard.update(user_properties)
+
+    # Get user balance
+    def get_balance(self, user: discord.Member):
+        return self.get_user(user.id).get("balance", 0.0)
+
+    def get_token_pool(self):
+        return self.token_pool.total()
+
+    def get_tokens(self, user: discord.Member):
+        user_properties = self.get_user(user.id)
+        return user_properties.get("tokens", 0) + self.get_unflushed_tokens(user_properties, user.id)
+
+    # Tokens queued or being flushed for a user and not yet in their document, counted in their balance
+    # so they can't be bet twice
+    def get_unflushed_tokens(self, user_properties: dict, user_id: int):
+        with self.pending_lock:
+            unflushed = self.pending_tokens.get(user_id, [0])[0]
+            flush_id, amount = self.flushing_tokens.get(user_id, (None, 0))
+            if user_properties.get("flushed") != flush_id:
+                unflushed += amount
+            return unflushed
+
+    def get_tokens_bought(self, user: discord.Member):
+        return self.get_user(user.id).get("tokens_bought", 0)
+
+    def get_token_leaderboard(self, limit=10):
+        leaderboard = self.leaderboards["tokens"].top(limit)
+        if leaderboard is not None:
+            return leaderboard
+        return list(self.get_values_sorted(collection="economy", query={},
+                                           fields={"cached_name": 1, "tokens": 1, "_id": 1},
+                                           sort_field="tokens", sort_direction=-1, limit=limit))
+
+    def get_leaderboard(self, limit=10):
+        leaderboard = self.leaderboards["balance"].top(limit)
+        if leaderboard is not None:
+            return leaderboard
+        return list(self.get_values_sorted(collection="economy", query={},
+                                           fields={"cached_name": 1, "balance": 1, "_id": 1},
+                                           sort_field="balance", sort_direction=-1, limit=limit))
+
+    # Get a page of the leaderboard of a field, sorted by (field, _id) and continuing after or before a
+    # (value, _id) cursor, so every page is an index seek. Returns the page and whether there are more pages
+    def get_leaderboard_page(self, field: str, after: tuple = None, before: tuple = None, limit: int = 10):
+        key = (field, after, before, limit)
+        page = self.page_cache.get(key)
+        if page is not None:
+            return page
+
+        leaderboard = None if after or before else self.leaderboards[field].top(limit + 1)
+        if leaderboard is not None:
+            page = leaderboard[:limit], len(leaderboard) > limit
+            self.page_cache.set(key, page)
+            return page
+
+        query = {}
+        sort = [(field, pymongo.DESCENDING), ("_id", pymongo.ASCENDING)]
+        if after:
+            query["$or"] = [{field: {"$lt": after[0]}}, {field: after[0], "_id": {"$gt": after[1]}}]
+        elif before:
+            # Walk the index backwards from the cursor and reverse the result
+            query["$or"] = [{field: {"$gt": before[0]}}, {field: before[0], "_id": {"$lt": before[1]}}]
+            sort = [(field, pymongo.ASCENDING), ("_id", pymongo.DESCENDING)]
+
+        documents = list(self.econ_col.find(query, {"cached_name": 1, field: 1, "_id": 1}).sort(sort).limit(limit + 1))
+        more = len(documents) > limit
+        documents = documents[:limit]
+        if before:
+            documents.reverse()
+
+        page = documents, more
+        self.page_cache.set(key, page)
+        return page
+
+    # Get a user's position on the leaderboard of a field, counted with the leaderboard index
+    def get_rank(self, user: discord.Member, field: str = "balance"):
+        value = self.get_user(user.id).get(field, 0)
+        rank = self.econ_col.count_documents({field: {"$gt": value}}) + 1
+        return rank, value
+
+    # Add to user balance
+    def add_balance(self, user: discord.Member, amount: float, session=None):
+        # Upsert so the user is created on their first transaction
+        user_properties = self.update_user({"_id": user.id},
+                                           {"$inc": {"balance": floor(amount, 2)},
+                                            "$set": {"cached_name": user.display_name},
+                                            "$setOnInsert": {"tokens": 0, "tokens_bought": 0}},
+                                           session=session)
+        return floor(user_properties["balance"], 2)
+
+    # Move money from sender to receiver, returns the sender's new balance or None if they can't afford it
+    def transfer(self, sender: discord.Member, receiver: discord.Member, amount: float):
+        amount = floor(amount, 2)
+
+        def transaction(session):
+            # Only take the money if the sender has enough of it
+            sender_properties = self.update_user({"_id": sender.id, "balance": {"$gte": amount}},
+                                                 {"$inc": {"balance": -amount},
+                                                  "$set": {"cached_name": sender.display_name}},
+                                                 upsert=False, session=session)
+            if not sender_properties:
+                return None
+
+            self.add_balance(receiver, amount, session=session)
+            return floor(sender_properties["balance"], 2)
+
+        return self.run_transaction(transaction)
+
+    # Buy tokens with money, returns the user's updated properties or None if they can't afford it
+    # or would exceed the weekly limit
+    def purchase_tokens(self, user: discord.Member, amount: int):
+        cost = floor(amount * Default.TOKEN_VALUE, 2)
+
+        def transaction(session):
+            user_properties = self.update_user(
+                {"_id": user.id, "balance": {"$gte": cost},
+                 "$or": [{"tokens_bought": {"$lte": Default.MAX_WEEKLY_TOKENS - amount}},
+                         {"tokens_bought": {"$exists": False}}]},
+                {"$inc": {"balance": -cost, "tokens": amount, "tokens_bought": amount},
+                 "$set": {"cached_name": user.display_name}},
+                upsert=False, session=session)
+            if not user_properties:
+                return None
+
+            self.add_token_pool(amount, session=session)
+            return user_properties
+
+        return self.run_transaction(transaction)
+
+    def add_tokens(self, user: discord.Member, amount: int, buy: bool = False, session=None):
+        update = {"$inc": {"tokens": amount},
+                  "$set": {"cached_name": user.display_name},
+                  "$setOnInsert": {"balance": 0}}
+        if buy:
+            update["$inc"]["tokens_bought"] = amount
+        else:
+            update["$setOnInsert"]["tokens_bought"] = 0
+
+        # Upsert so the user is created on their first transaction
+        user_properties = self.update_user({"_id": user.id}, update, session=session)
+        return user_properties["tokens"]
+
+    # Give tokens to a user only known by id, like the player of an expired game
+    def pay_tokens(self, user_id: int, amount: int):
+        self.update_user({"_id": user_id}, {"$inc": {"tokens": amount}}, upsert=False)
+
+    def save_game(self, game: dict):
+        self.game_col.insert_one(game)
+
+    def get_game(self, game_id: ObjectId):
+        return self.game_col.find_one({"_id": game_id})
+
+    # Replace a game if the user's cards are still the ones it was loaded with, returns whether it was replaced
+    def update_game(self, game_id: ObjectId, user_cards: bytes, game: dict):
+        return self.game_col.replace_one({"_id": game_id, "user_cards": user_cards}, game).modified_count == 1
+
+    # Delete a finished game if the user's cards are still the ones it was loaded with, returns whether it was deleted
+    def delete_game(self, game_id: ObjectId, user_cards: bytes):
+        return self.game_col.delete_one({"_id": game_id, "user_cards": user_cards}).deleted_count == 1
+
+    def count_games(self):
+        return self.game_col.estimated_document_count()
+
+    # Delete games without a move in the last timeout seconds, returns the deleted games so they can be settled.
+    # Games saved before moves were timed have no moved field and count as expired
+    def expire_games(self, timeout: float):
+        query = {"moved": {"$not": {"$gte": time.time() - timeout}}}
+        expired = []
+        for game in self.game_col.find(query, {"_id": 1}):
+            # Deleting one at a time makes sure a game that was just played or finished isn't settled twice
+            game = self.game_col.find_one_and_delete({**query, "_id": game["_id"]})
+            if game:
+                expired.append(game)
+        return expired
+
+    # Add tokens, batched with other users' changes if write behind is enabled, returns the user's new tokens
+    def queue_tokens(self, user: discord.Member, amount: int):
+        if not self.write_behind:
+            return self.add_tokens(user, amount)
+
+        with self.pending_lock:
+            pending = self.pending_tokens.setdefault(user.id, [0, None])
+            pending[0] += amount
+            pending[1] = user.display_name
+        return self.get_tokens(user)
+
+    # Write all queued token changes in one bulk write, returns the number of users written
+    def flush_tokens(self):
+        # Flushes run one at a time, so a user has at most one amount being flushed
+        with self.flush_lock:
+            # A flush that failed without knowing what it wrote is confirmed before anything else is flushed
+            if self.unconfirmed_flush:
+                self.confirm_flush()
+
+            flush_id = ObjectId()
+            with self.pending_lock:
+                pending, self.pending_tokens = self.pending_tokens, {}
+                for user_id, (amount, _) in pending.items():
+                    self.flushing_tokens[user_id] = (flush_id, amount)
+            if len(pending) == 0:
+                return 0
+
+            start = time.perf_counter()
+            failed = {}
+            try:
+                self.econ_col.bulk_write([pymongo.UpdateOne({"_id": user_id},
+                                                            {"$inc": {"tokens": amount, "version": 1},
+                                                             "$set": {"cached_name": cached_name, "flushed": flush_id},
+                                                             "$setOnInsert": {"balance": 0, "tokens_bought": 0}},
+                                                            upsert=True)
+                                          for user_id, (amount, cached_name) in pending.items()], ordered=False)
+            except pymongo.errors.BulkWriteError as error:
+                # Only the writes listed in the error failed, the others were written
+                user_ids = list(pending)
+                failed = {user_ids[write_error["index"]]: pending[user_ids[write_error["index"]]]
+                          for write_error in error.details["writeErrors"]}
+                self.requeue_tokens(failed)
+                bulk_write_error = error
+            except pymongo.errors.PyMongoError:
+                # The server may have applied any part of the batch before the error, so only the changes
+                # whose documents aren't marked with this flush are queued again
+                self.unconfirmed_flush = (flush_id, pending)
+                self.confirm_flush()
+                raise
+
+            written = [user_id for user_id in pending if user_id not in failed]
+            self.cache_flushed(written)
+
+            self.flush_latency.record(time.perf_counter() - start)
+            self.flush_size.record(len(written))
+            if failed:
+                raise bulk_write_error
+            return len(written)
+
+    # Find which changes of a failed flush were written by the flush id they were written with and queue the
+    # others again. If this fails too, the flushed amounts stay counted until a later flush confirms them
+    def confirm_flush(self):
+        flush_id, batch = self.unconfirmed_flush
+        written = {user_properties["_id"] for user_properties in
+                   self.econ_col.find({"_id": {"$in": list(batch)}, "flushed": flush_id}, {"_id": 1})}
+        self.unconfirmed_flush = None
+
+        self.requeue_tokens({user_id: change for user_id, change in batch.items() if user_id not in written})
+        self.cache_flushed(list(written))
+
+    # Cache the documents written by a flush, which no longer need their flushed amounts
+    def cache_flushed(self, written: list):
+        users = []
+        try:
+            users = list(self.econ_col.find({"_id": {"$in": written}}))
+        finally:
+            # The documents are marked with this flush, so once they are cached the flushed amounts aren't
+            # needed. A newer document stays cached, and documents that couldn't be read are read on their next use
+            with self.pending_lock:
+                for user_properties in users:
+                    self.user_cache.set(user_properties["_id"], user_properties)
+                read = {user_properties["_id"] for user_properties in users}
+                for user_id in written:
+                    if user_id not in read:
+                        self.user_cache.pop(user_id)
+                    del self.flushing_tokens[user_id]
+
+        for user_properties in users:
+            for leaderboard in self.leaderboards.values():
+                leaderboard.update(user_properties)
+
+    # Queue token changes a flush couldn't write again, added to the changes queued since
+    def requeue_tokens(self, changes: dict):
+        with self.pending_lock:
+            for user_id, (amount, cached_name) in changes.items():
+                pending = self.pending_tokens.setdefault(user_id, [0, cached_name])
+                pending[0] += amount
+                del self.flushing_tokens[user_id]
+
+    def add_token_pool(self, amount: int, session=None):
+        self.token_pool.add(amount, session=session)
+
+    def reset_tokens(self, chunk_size: int = 1000, pause: float = 0.05):
+        # Make sure the winners are read from the database
+        self.flush_tokens()
+        self.seed_leaderboards()
+
+        leaderboard = self.get_token_leaderboard(3)
+        if len(leaderboard) == 0:
+            self.token_pool.reset()
+            return leaderboard, 0
+
+        # Empty the pool and distribute what was in it
+        pool = self.token_pool.reset()
+
+        winner_amount = len(leaderboard)
+
+        winners = []
+        payouts = []
+
+        for x in range(winner_amount):
+            # w = winner_amount, i = index, pool = pool, token_value = Default.TOKEN_VALUE
+            # Rewards calculated (w - i) / (w * ((w+1)/2)) * pool * token_value
+            reward = floor(
+                round(((winner_amount - x) / (winner_amount * ((winner_amount + 1) / 2)) * pool)) * Default.TOKEN_VALUE,
+                2)
+
+            user_id = leaderboard[x]["_id"]
+            name = leaderboard[x]["cached_name"]
+
+            # Add reward to user using this method because add_balance needs a discord.Member object
+            payouts.append(pymongo.UpdateOne({"_id": user_id}, {"$inc": {"balance": reward, "version": 1}}))
+
+            # Add winner and reward
+            winners.append({"_id": user_id, "reward": reward, "name": name})
+
+        self.econ_col.bulk_write(payouts, ordered=False)
+
+        # Remove pool and all tokens in circulation
+        self.reset_token_holders(chunk_size, pause)
+        self.user_cache.clear()
+
+        # Every token balance and the winners' balances changed
+        self.seed_leaderboards()
+
+        return winners, pool
+
+    # Reset tokens of the users holding or having bought tokens, a chunk at a time to spread out the write load
+    def reset_token_holders(self, chunk_size: int = 1000, pause: float = 0.05):
+        # Negative balances aren't in the partial indexes, but are found through the token leaderboard index
+        for query in [{"tokens": {"$gt": 0}}, {"tokens_bought": {"$gt": 0}}, {"tokens": {"$lt": 0}}]:
+            while True:
+                user_ids = [user["_id"] for user in self.econ_col.find(query, {"_id": 1}).limit(chunk_size)]
+                if len(user_ids) == 0:
+                    break
+
+                self.econ_col.update_many({"_id": {"$in": user_ids}}, {"$set": {"tokens": 0, "tokens_bought": 0},
+                                                                         "$inc": {"version": 1}})
+                time.sleep(pause)
+
+    # Get the dailies of today and the next 4 days, they are derived from the day so no database is needed
+    def get_dailies(self):
+        return create_dailies(get_day(), 5)
+
+    def is_daily_claimed(self, user: discord.Member):
+        econ_user = self.get_user(user.id)
+        if not econ_user:
+            return False
+        if 'daily' not in econ_user:
+            return False
+        if econ_user['daily'] < get_day():
+            return False
+        return True
+
+    # Claim today's daily in one conditional upsert, returns the daily or None if it was already claimed today
+    def claim_daily(self, user: discord.Member):
+        day = get_day()
+        daily = get_daily(day)
+
+        def transaction(session):
+            self.update_user({"_id": user.id, "$or": [{"daily": {"$lt": day}}, {"daily": {"$exists": False}}]},
+                             {"$set": {'daily': day, "cached_name": user.display_name},
+                              "$inc": {"balance": daily['money'],
+                                       "tokens": daily['tokens']},
+                              "$setOnInsert": {"tokens_bought": 0}},
+                             session=session)
+            self.add_token_pool(daily['tokens'], session=session)
+            return daily
+
+        try:
+            return self.run_transaction(transaction)
+        except pymongo.errors.DuplicateKeyError:
+            # The user exists but didn't match the filter, so the upsert tried to create them again
+            self.user_cache.pop(user.id)
+            return None
+
+
+class AsyncEconomyDatabaseHandler(AsyncDatabaseHandler):
+    def __init__(self, max_workers: int = 8, transactions: bool = False, write_behind: bool = False):
+        super().__init__(lambda: EconomyDatabaseHandler(transactions, write_behind), max_workers)
+        self.write_behind = write_behind
+
+
+def create_dailies(start: int, amount: int):
+    return [get_daily(start + x) for x in range(amount)]
+
+
+# Get the daily of a day, generated from the daily seed so every bot process gets the same dailies
+@functools.lru_cache(maxsize=16)
+def get_daily(day: int):
+    generator = random.Random(f"{Default.DAILY_SEED}:{day}")
+    money = floor(generator.randint(Default.MIN_DAILY_MONEY, Default.MAX_DAILY_MONEY), -1)
+    tokens = int(round(generator.randint(Default.MIN_DAILY_TOKENS, Default.MAX_DAILY_TOKENS), -1))
+    return {"money": money, "tokens": tokens, "day": day}
@@ -0,0 +1,21 @@
+import asyncio, time, contextlib
+from vkp.metrics import Stats
+
+
+# Striped locks keyed by user id, so each user's mutations run one at a time while different users run in parallel
+class UserLocks:
+    def __init__(self, stripes: int = 64):
+        self.locks = [asyncio.Lock() for _ in range(stripes)]
+        self.wait_time = Stats("User lock wait time (s)")
+
+    @contextlib.asynccontextmanager
+    async def lock(self, *user_ids: int):
+        # Always lock stripes in the same order, so locking two users at once can't deadlock
+        stripes = sorted({user_id % len(self.locks) for user_id in user_ids})
+
+        start = time.perf_counter()
+        async with contextlib.AsyncExitStack() as stack:
+            for stripe in stripes:
+                await stack.enter_async_context(self.locks[stripe])
+            self.wait_time.record(time.perf_counter() - start)
+            yield
@@ -0,0 +1,24 @@
+import threading
+
+
+# Count, total and maximum of a measurement
+class Stats:
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.lock = threading.Lock()
+
+    def record(self, value: float):
+        with self.lock:
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else 0
+
+    def __str__(self):
+        return f"{self.name}: count={self.count} average={self.average:.4f} max={self.max:.4f}"
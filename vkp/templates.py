@@ -0,0 +1,35 @@
+import os, json, time, threading
+
+
+# JSON templates from the templates folder, loaded on first use and reloaded when their file changes
+class TemplateRegistry:
+    def __init__(self, directory: str, check_interval: float = 1):
+        self.directory = directory
+        self.check_interval = check_interval
+        # (name, parse) -> [file modification time, last time it was checked, parsed template]
+        self.templates = {}
+        self.lock = threading.Lock()
+
+    # Get a template, parse turns the loaded json into the form that is cached
+    def get(self, name: str, parse=None):
+        key = (name, parse)
+        # Templates are read on hot paths like dealing cards, so recently checked ones are returned without locking
+        template = self.templates.get(key)
+        if template and time.monotonic() - template[1] < self.check_interval:
+            return template[2]
+
+        # Only reload the file if it has been changed since it was loaded
+        path = os.path.join(self.directory, name + ".json")
+        modified = os.stat(path).st_mtime_ns
+        if not template or template[0] != modified:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            template = [modified, 0, parse(value) if parse else value]
+
+        with self.lock:
+            template[1] = time.monotonic()
+            self.templates[key] = template
+        return template[2]
+
+
+TEMPLATES = TemplateRegistry(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates"))
@@ -0,0 +1,93 @@
+import discord, time, math
+from datetime import datetime
+from vkp.config import Default
+
+
+# Simple error embed to improve consistency
+def error_embed(user: discord.Member, error: str):
+    embed = simple_embed(title=error, colour=Default.ERROR_COLOUR,
+                         footer_icon=user.display_avatar.url, footer=user.display_name,
+                         timestamp=datetime.now())
+    return embed
+
+
+# Simple one line message embed to improve consistency
+def simple_message_embed(user: discord.Member, message: str):
+    embed = simple_embed(title=message,
+                         footer_icon=user.display_avatar.url, footer=user.display_name,
+                         timestamp=datetime.now())
+    return embed
+
+
+def simple_embed(title=None, description=None, colour=Default.COLOUR, url=None, fields=None,
+                 author_name=None, author_url=None, author_icon=None,
+                 footer=None, footer_icon=None,
+                 thumbnail=None, image=None, timestamp=None):
+    # Change fields into embed fields
+    if fields is None:
+        fields = []
+    embed_fields = []
+    for field in fields:
+        if "inline" not in field:
+            field["inline"] = False
+        embed_fields.append(discord.EmbedField(field['name'], field['value'], field['inline']))
+
+    embed = discord.Embed(colour=colour, url=url, fields=embed_fields, timestamp=timestamp)
+
+    if title:
+        embed.title = title
+
+    if description:
+        embed.description = description
+
+    if not title and not description:
+        embed.description = "_ _"
+
+    if author_name:
+        embed.set_author(name=author_name, icon_url=author_icon, url=author_url)
+
+    if thumbnail:
+        embed.set_thumbnail(url=thumbnail)
+
+    if image:
+        embed.set_image(url=image)
+
+    embed.set_footer(text=footer, icon_url=footer_icon)
+
+    return embed
+
+
+# Round to floor with n amount of decimal places    0.02 * 10^2 = 2 / 10^2 = 0.02
+def floor(i, n):
+    return round(int(i * 10 ** n) / 10 ** n, n)
+
+
+# Format money for consistency
+def format_money(amount: float):
+    amount = floor(amount, 2)
+    if int(amount) == amount and amount >= 1000:
+        return str(int(amount)) + " " + Default.CURRENCY
+
+    decimals_missing = 2 - count_decimals(amount)
+
+    if decimals_missing == 2:
+        return str(amount) + "." + "0" * decimals_missing + " " + Default.CURRENCY
+    return str(amount) + "0" * decimals_missing + " " + Default.CURRENCY
+
+
+# Format tokens for consistency
+def format_tokens(amount: int):
+    return str(round(amount)) + " " + Default.TOKENS
+
+
+# Count decimals in a float
+def count_decimals(num: float):
+    if '.' in str(num):
+        return len(str(num).split('.')[1])
+    else:
+        return 0
+
+
+# Get current day
+def get_day():
+    return math.floor((time.time() / 60 / 60 + 1) / 24)
@@ -0,0 +1,374 @@
+import discord, random, time, zlib
+from bson import ObjectId
+from datetime import datetime
+from vkp.config import Default
+from vkp.database import AsyncEconomyDatabaseHandler
+from vkp.templates import TEMPLATES
+from vkp.utils import (floor, error_embed, simple_message_embed, simple_embed, format_money, format_tokens)
+
+
+class Blackjack:
+    CARD_BACK = "<:cardBack:941039219135086622>"
+    TITLE = "♠ Blackjack ♦"
+    FOOTER = "Dealer must draw to 16 and stand on all 17's"
+
+    def __init__(self):
+        # Shoes shared by the games in a channel or guild
+        self.shoes = {}
+        self.load_deck()
+
+    # Cards are numbers indexing the card emojis and values, shared by every game. The deck is resolved once
+    # instead of on every card and isn't reloaded when its file changes, since shoes and games index into it
+    def load_deck(self):
+        self.cards, self.values = TEMPLATES.get("cardDeck", Blackjack.parse_deck)
+        # Stored games outlive the process, so they record the deck they were dealt from
+        self.deck_id = zlib.crc32("".join(self.cards).encode() + self.values)
+
+    @staticmethod
+    def parse_deck(deck: list):
+        # Aces are worth 11 until the hand would bust
+        return (tuple(card["card"] for card in deck),
+                bytes(11 if card["value"] == "ace" else card["value"] for card in deck))
+
+    # Several decks of card numbers shuffled together and dealt in order to every game sharing the shoe
+    class Shoe:
+        __slots__ = ("cards", "position", "cut")
+
+        def __init__(self, card_amount: int, decks: int, penetration: float):
+            self.cards = bytearray(range(card_amount)) * decks
+            self.cut = int(len(self.cards) * penetration)
+            self.shuffle()
+
+        def shuffle(self):
+            random.shuffle(self.cards)
+            self.position = 0
+
+        # Reshuffle before a game once the cut card has been reached
+        def start_game(self):
+            if self.position >= self.cut:
+                self.shuffle()
+
+        def draw(self):
+            # Only happens if a lot of games are played at once after the cut card
+            if self.position >= len(self.cards):
+                self.shuffle()
+
+            card = self.cards[self.position]
+            self.position += 1
+            return card
+
+    # Shoes are shared per channel or guild, depending on Default.BLACKJACK_SHOE_SCOPE
+    def shoe_key(self, channel_id: int, guild_id: int):
+        return guild_id if Default.BLACKJACK_SHOE_SCOPE == "guild" else channel_id
+
+    def get_shoe(self, key: int):
+        if key not in self.shoes:
+            self.shoes[key] = self.Shoe(len(self.cards), Default.BLACKJACK_DECKS, Default.BLACKJACK_PENETRATION)
+        return self.shoes[key]
+
+    # Cards in a hand, with the total and the aces still counted as 11 updated as cards are added
+    class Hand:
+        __slots__ = ("cards", "total", "soft_aces")
+
+        def __init__(self):
+            self.cards = bytearray()
+            self.total = 0
+            self.soft_aces = 0
+
+        def add(self, card: int, value: int):
+            self.cards.append(card)
+            self.total += value
+            if value == 11:
+                self.soft_aces += 1
+
+            # Adjust value of aces
+            while self.soft_aces > 0 and self.total > 21:
+                self.total -= 10
+                self.soft_aces -= 1
+
+    # Everything needed to continue a game when one of its buttons is pressed
+    class Game:
+        __slots__ = ("game_id", "user_id", "amount", "shoe_key", "user_hand", "dealer_hand", "created", "moved")
+
+        def __init__(self, game_id: ObjectId, user_id: int, amount: int, shoe_key: int, created: float,
+                     moved: float = None):
+            self.game_id = game_id
+            self.user_id = user_id
+            self.amount = amount
+            self.shoe_key = shoe_key
+            self.user_hand = Blackjack.Hand()
+            self.dealer_hand = Blackjack.Hand()
+            self.created = created
+            # Time of the last move, games without moves for a while are expired
+            self.moved = moved or created
+
+    # Deal a new game, returns the game and its outcome if it was decided by a blackjack
+    def start_game(self, user: discord.Member, amount: int, channel_id: int, guild_id: int):
+        game = self.Game(ObjectId(), user.id, amount, self.shoe_key(channel_id, guild_id), time.time())
+        shoe = self.get_shoe(game.shoe_key)
+        shoe.start_game()
+        self.random_card(shoe, game.user_hand)
+        self.random_card(shoe, game.user_hand)
+        self.random_card(shoe, game.dealer_hand)
+        self.random_card(shoe, game.dealer_hand)
+
+        return game, self.check_for_blackjack(game)
+
+    # Games are stored in the database between button presses, so they survive restarts
+    def to_document(self, game):
+        return {"_id": game.game_id, "user_id": game.user_id, "amount": game.amount, "shoe_key": game.shoe_key,
+                "user_cards": bytes(game.user_hand.cards), "dealer_cards": bytes(game.dealer_hand.cards),
+                "created": game.created, "moved": game.moved, "deck": self.deck_id}
+
+    # Games dealt from another deck can't be continued, their card numbers would mean other cards
+    def same_deck(self, document: dict):
+        return document.get("deck") == self.deck_id
+
+    def from_document(self, document: dict):
+        game = self.Game(document["_id"], document["user_id"], document["amount"], document["shoe_key"],
+                         document["created"], document.get("moved"))
+        values = self.values
+        for hand, cards in [(game.user_hand, document["user_cards"]), (game.dealer_hand, document["dealer_cards"])]:
+            for card in cards:
+                hand.add(card, values[card])
+        return game
+
+    # Hit or stand, returns the outcome or None if the game continues
+    def play(self, game, action: str):
+        game.moved = time.time()
+        return self.user_draw(game) if action == "hit" else self.dealer_draw(game)
+
+    # Stand for a user who stopped playing, so leaving a game can't be used to get the bet back.
+    # Returns the outcome
+    def expire(self, document: dict):
+        if not self.same_deck(document):
+            return self.deck_changed(document["amount"])
+        return self.dealer_draw(self.from_document(document))
+
+    # Outcomes are (reason, message, tokens paid out to the user)
+    def check_for_blackjack(self, game):
+        if game.user_hand.total == 21:
+            if game.dealer_hand.total == 21:  # Draw
+                return self.game_draw(game)
+            return self.user_win(game, "Blackjack!", floor(game.amount * Default.BLACKJACK_PAYOUT, 2))  # User Blackjack
+        if game.dealer_hand.total == 21:  # Dealer blackjack
+            return self.dealer_win(game, "Dealer got blackjack!")
+
+    # User draws card
+    def user_draw(self, game):
+        self.random_card(self.get_shoe(game.shoe_key), game.user_hand)
+        if game.user_hand.total > 21:  # User bust
+            return self.dealer_win(game, "Bust!")
+        if game.user_hand.total == 21:  # Time for dealer to draw
+            return self.dealer_draw(game)
+
+        return None  # Nothing happens
+
+    # Dealer draws cards
+    def dealer_draw(self, game):
+        shoe = self.get_shoe(game.shoe_key)
+        while game.dealer_hand.total < Default.DEALER_STANDS_ON:
+            self.random_card(shoe, game.dealer_hand)
+
+        dealer_value = game.dealer_hand.total
+        user_value = game.user_hand.total
+
+        if dealer_value > 21:  # Dealer bust
+            return self.user_win(game, "Dealer bust!", game.amount)
+        if dealer_value == user_value:  # Draw
+            return self.game_draw(game)
+        if dealer_value > user_value:  # Dealer win
+            return self.dealer_win(game, "Dealer won!")
+
+        return self.user_win(game, "You won!", game.amount)  # User win
+
+    def dealer_win(self, game, reason: str):
+        return reason, f"You lost {format_tokens(game.amount)}", 0
+
+    def user_win(self, game, reason: str, amount: int):
+        return reason, f"You won {format_tokens(amount)}", game.amount + amount
+
+    def game_draw(self, game):
+        return "Draw!", "You get your tokens back!", game.amount
+
+    def deck_changed(self, amount: int):
+        return "The card deck changed!", "You get your tokens back!", amount
+
+    # Draw the next card of a game's shoe into a hand, the shoe is looked up once per move
+    def random_card(self, shoe, hand):
+        card = shoe.draw()
+        hand.add(card, self.values[card])
+
+    def embed(self, game, user: discord.Member, outcome: tuple = None):
+        embed = simple_embed(title=self.TITLE, fields=self.hand_embed_fields(game, outcome is not None),
+                             footer=self.FOOTER, timestamp=datetime.fromtimestamp(game.created),
+                             footer_icon=user.display_avatar.url)
+        if outcome:
+            embed.add_field(name=outcome[0], value=outcome[1])
+        return embed
+
+    def hand_embed_fields(self, game, win: bool = False):
+        card_emoji = self.cards.__getitem__
+
+        # Hide one card if game isn't won yet
+        if win:
+            dealer_cards = "".join(map(card_emoji, game.dealer_hand.cards))
+            dealer_value = game.dealer_hand.total
+        else:
+            dealer_cards = card_emoji(game.dealer_hand.cards[0]) + self.CARD_BACK
+            dealer_value = self.values[game.dealer_hand.cards[0]]
+
+        user_cards = "".join(map(card_emoji, game.user_hand.cards))
+        user_value = game.user_hand.total
+
+        return [
+            {"name": f"Dealer | {dealer_value}",
+             "value": dealer_cards},
+            {"name": f"User | {user_value}",
+             "value": user_cards}
+        ]
+
+    # Buttons of a game, routed to handle_interaction by their custom_id
+    def components(self, game, finished: bool = False):
+        return component_view(
+            discord.ui.Button(label="Hit", style=discord.ButtonStyle.primary, disabled=finished,
+                              custom_id=f"blackjack,hit,{game.game_id}"),
+            discord.ui.Button(label="Stand", style=discord.ButtonStyle.primary, disabled=finished,
+                              custom_id=f"blackjack,stand,{game.game_id}"))
+
+    # Handle a blackjack button, arguments are the split custom_id: blackjack,action,game id
+    async def handle_interaction(self, interaction: discord.Interaction, arguments: list,
+                                 edb: AsyncEconomyDatabaseHandler):
+        document = await edb.get_game(ObjectId(arguments[2]))
+
+        # Remove the buttons of games that have ended or expired
+        if not document:
+            await interaction.response.edit_message(view=None)
+            return
+
+        # Check if the user is the correct user
+        if interaction.user.id != document["user_id"]:
+            await interaction.response.defer()
+            return
+
+        # Return the bet of a game dealt from another deck, if no other click returned it already
+        if not self.same_deck(document):
+            outcome = self.deck_changed(document["amount"])
+            if await edb.delete_game(document["_id"], document["user_cards"]):
+                await edb.queue_tokens(interaction.user, outcome[2])
+            await interaction.response.edit_message(embed=error_embed(interaction.user, outcome[0] + " " + outcome[1]),
+                                                    view=None)
+            return
+
+        game = self.from_document(document)
+        outcome = self.play(game, arguments[1])
+
+        # Only save the game if nothing else changed it since it was loaded, so quick clicks can't pay out twice
+        if outcome:
+            saved = await edb.delete_game(game.game_id, document["user_cards"])
+        else:
+            saved = await edb.update_game(game.game_id, document["user_cards"], self.to_document(game))
+        if not saved:
+            await interaction.response.defer()
+            return
+
+        # Pay out the tokens won before responding, the game is already gone so a failed response can't lose them
+        if outcome and outcome[2]:
+            await edb.queue_tokens(interaction.user, outcome[2])
+
+        await interaction.response.edit_message(embed=self.embed(game, interaction.user, outcome),
+                                                view=self.components(game, outcome is not None))
+
+
+# Claim button of the dailies forecast, routed to handle_daily_interaction by its custom_id
+def daily_components(member: discord.Member):
+    return component_view(discord.ui.Button(label="Claim daily", style=discord.ButtonStyle.primary,
+                                            custom_id=f"daily,claim,{member.id}"))
+
+
+# Handle a daily button, arguments are the split custom_id: daily,claim,user id
+async def handle_daily_interaction(interaction: discord.Interaction, arguments: list,
+                                   edb: AsyncEconomyDatabaseHandler):
+    # Check if the user is the correct user
+    if interaction.user.id != int(arguments[2]):
+        await interaction.response.defer()
+        return
+
+    member = interaction.user
+    daily = await edb.claim_daily(member)
+    if not daily:
+        await interaction.response.send_message(
+            embed=error_embed(member, "You have already claimed today's daily reward"), ephemeral=True)
+    else:
+        embed = simple_message_embed(member,
+                                     f"You claimed today's daily of {format_money(daily['money'])} and {format_tokens(daily['tokens'])}")
+        embed.description = f"{format_tokens(daily['tokens'])} were added to the token pool"
+        await interaction.response.send_message(embed=embed)
+    await interaction.message.edit(view=None)
+
+
+# View holding components that are handled in on_interaction by their custom_id. It's stopped straight away,
+# so discord doesn't keep it in memory waiting for interactions
+def component_view(*items: discord.ui.Item):
+    view = discord.ui.View(*items, timeout=None)
+    view.stop()
+    return view
+
+
+class LeaderboardView(discord.ui.View):
+    def __init__(self, member: discord.Member, edb: AsyncEconomyDatabaseHandler, field: str, title: str,
+                 format_value, limit: int = 10):
+        super().__init__()
+        self.member = member
+        self.edb = edb
+        self.field = field
+        self.title = title
+        self.format_value = format_value
+        self.limit = limit
+        self.page = 1
+        self.documents = []
+        self.timeout = 120
+        self.disable_on_timeout = True
+
+    # Load the first page, or the page after or before a (value, _id) cursor
+    async def load(self, after: tuple = None, before: tuple = None):
+        self.documents, more = await self.edb.get_leaderboard_page(self.field, after, before, self.limit)
+
+        # Going back always leaves a next page, going forward only if the database had more
+        self.previous_callback.disabled = self.page == 1
+        self.next_callback.disabled = not (before or more)
+
+    def cursor(self, document: dict):
+        return document.get(self.field, 0), document["_id"]
+
+    def embed(self):
+        embed = simple_message_embed(self.member, self.title)
+        for x in range(len(self.documents)):
+            user = self.documents[x]
+            embed.add_field(name=f"{(self.page - 1) * self.limit + x + 1} | {user['cached_name']}",
+                            value=self.format_value(user.get(self.field, 0)), inline=False)
+        if len(self.documents) == 0:
+            embed.add_field(name="No users yet", value="_ _", inline=False)
+        return embed
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.primary)
+    async def previous_callback(self, _, interaction: discord.Interaction):
+        # Check if the user is the correct user
+        if interaction.user.id != self.member.id or self.page == 1:
+            await interaction.response.defer()
+            return
+
+        self.page -= 1
+        await self.load(before=self.cursor(self.documents[0]))
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.primary)
+    async def next_callback(self, _, interaction: discord.Interaction):
+        # Check if the user is the correct user
+        if interaction.user.id != self.member.id or len(self.documents) == 0:
+            await interaction.response.defer()
+            return
+
+        self.page += 1
+        await self.load(after=self.cursor(self.documents[-1]))
+        await interaction.response.edit_message(embed=self.embed(), view=self)